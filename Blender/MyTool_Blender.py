@@ -1,9 +1,19 @@
-﻿import os
+import os
 import re
-from collections import defaultdict
-from mathutils import Vector
+import sys
+import time
+import shutil
+import argparse
+import fnmatch
+import hashlib
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from mathutils import Vector, Matrix
 
 import bpy
+import bmesh
+import numpy as np
 import json
 
 # =================================================
@@ -13,10 +23,23 @@ bl_info = {
     "category": "3D View"
 }
 
+# 核心逻辑放在同目录的 MyTool_Core.py 中，命令行运行时目录不一定在 sys.path 里
+ADDON_DIRPATH = os.path.dirname(os.path.abspath(__file__))
+if ADDON_DIRPATH not in sys.path:
+    sys.path.insert(0, ADDON_DIRPATH)
+
+import MyTool_Core as core
+from MyTool_Core import (
+    FBX_EXPORT_SETTINGS, LAYOUT_CHUNK_MODES, LAYOUT_FIELDS, LAYOUT_ID_PROPERTY, LINT_MESSAGES, ExportLint, JobQueue,
+    ObjectNameIndex, assign_layout_ids, check_names, collect_layout, ensure_naming_config, ensure_parent_dir,
+    get_base_name, get_collection_filepaths, get_export_prefix, get_fbx_filepath, get_manifest_key, get_temp_filepath,
+    is_layout_object, load_fbx_manifest, load_naming_config, my_size_dict, order_layout_items, patch_stats,
+    plan_renames, profile_count, profile_phase, profile_steps, read_layout_snapshot, remove_file, run_steps,
+    save_fbx_manifest, split_export_shards, start_profiling, stop_profiling, write_instance_table, write_layout_chunks,
+    write_layout_with_patch, write_size_table,
+)
+
 # =================================================
-my_size_dict = {}
-tree_path = []
-tree_root = None
 if_sync0 = False
 if_sync1 = False
 now_name = ""
@@ -27,69 +50,225 @@ interp_z = 0.5
 
 
 # ======================================================================================================================
-# 树形结构
-class TreeNode:
-    def __init__(self, value):
-        self.value = value
-        self.children = []
+# 基础名字索引，通过 depsgraph / load_post 保持更新
+name_index = ObjectNameIndex(lambda: bpy.data.objects)
+
+
+@bpy.app.handlers.persistent
+def name_index_load_post(*args):
+    name_index.mark_dirty()
+
+
+@bpy.app.handlers.persistent
+def name_index_depsgraph_update(scene, depsgraph):
+    profile_count("depsgraph_updates")
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            name_index.touch(update.id.original)
 
-    def add_child(self, node):
-        self.children.append(node)
+
+NAME_INDEX_HANDLERS = (
+    (bpy.app.handlers.load_post, name_index_load_post),
+    (bpy.app.handlers.undo_post, name_index_load_post),
+    (bpy.app.handlers.redo_post, name_index_load_post),
+    (bpy.app.handlers.depsgraph_update_post, name_index_depsgraph_update),
+)
 
 
 # ======================================================================================================================
-# 检查 JSON 文件格式
-def parse_json_to_tree(json_data):
-    if not isinstance(json_data, list) or not json_data:
-        raise ValueError("JSON 数据为空或无法读取")
+# 导出检查：结果按物体缓存，depsgraph 报告的物体和网格下次检查时重新读取
+# 打开文件、撤销后指针会变化，全部重新检查
+LINT_REPORT_LINES = 20
+export_lint = ExportLint()
+lint_summary = ""
+
+
+@bpy.app.handlers.persistent
+def export_lint_load_post(*args):
+    export_lint.mark_dirty()
+
+
+@bpy.app.handlers.persistent
+def export_lint_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            export_lint.touch(update.id.original.as_pointer())
+        elif isinstance(update.id, bpy.types.Mesh):
+            export_lint.touch_data(update.id.original.as_pointer())
 
-    naming_config = json_data[0].get("title", {})
-    if naming_config != "命名配置表":
-        raise ValueError(f"Json 文件的第一个 title 应该是 '命名配置表',但获取到的是 '{naming_config}'")
 
-    root = TreeNode(naming_config)
-    topics = json_data[0].get("topics", [])
+EXPORT_LINT_HANDLERS = (
+    (bpy.app.handlers.load_post, export_lint_load_post),
+    (bpy.app.handlers.undo_post, export_lint_load_post),
+    (bpy.app.handlers.redo_post, export_lint_load_post),
+    (bpy.app.handlers.depsgraph_update_post, export_lint_depsgraph_update),
+)
 
-    build_base_tree(root, topics, "")
 
-    if not root:
-        raise ValueError(f"构建树失败，请检查错误")
-    return root
+# 读取检查需要的物体信息，只对新物体和修改过的物体调用
+def inspect_lint_object(obj):
+    if obj.type != 'MESH':
+        return None
+    mesh = obj.data
+    return {
+        "name": obj.name,
+        "data": mesh.as_pointer(),
+        "mesh": (len(mesh.vertices), len(mesh.polygons)),
+        "location": tuple(obj.location),
+        "rotation": tuple(obj.matrix_basis.to_quaternion()),
+        "scale": tuple(obj.scale),
+    }
 
 
-# 构建树并存储字典
-def build_base_tree(parent_node, topics, nowname):
-    for topic in topics:
-        if topic["title"] != "Bound":
-            node = TreeNode(topic["title"])
-            parent_node.add_child(node)
+# 检查文件中的所有网格物体
+def run_export_lint():
+    return export_lint.run(bpy.data.objects, inspect_lint_object, core.legal_names)
+
+
+def format_lint_issue(code, name, detail):
+    message = f"{LINT_MESSAGES[code]}: {name}"
+    return f"{message}，{detail}" if detail else message
+
+
+# 返回 (错误数量, 警告数量)
+def report_lint(result, report, limit=None):
+    issues = result["issues"]
+    for level, code, name, detail in issues[:limit]:
+        report(level, format_lint_issue(code, name, detail))
+    if limit is not None and len(issues) > limit:
+        report('INFO', f"另有 {len(issues) - limit} 项未显示")
+
+    error_count = sum(1 for issue in issues if issue[0] == 'ERROR')
+    return error_count, len(issues) - error_count
+
+
+# ======================================================================================================================
+# 命名配置表：路径保存在场景属性中（随 .blend 保存），打开文件或第一次绘制面板时从缓存恢复
+def get_config_cache_dirpath():
+    return bpy.utils.user_resource('CONFIG', path="mytool_cache", create=True)
+
 
-            thisname = re.sub(r'[^a-zA-Z0-9]', '', topic["title"]) + "_"
-            if "topics" in topic and topic["topics"]:
-                build_base_tree(node, topic["topics"], nowname+thisname)
+# 场景记录的配置文件未加载或有变化时加载，出错只输出到控制台，同一个文件不会重复尝试
+def restore_naming_config(scene):
+    tool = getattr(scene, "my_tool", None)
+    if tool is None or not tool.config_filepath:
+        return False
+
+    try:
+        return ensure_naming_config(bpy.path.abspath(tool.config_filepath), get_config_cache_dirpath())
+    except Exception as e:
+        print(f"MyTool: 命名配置表加载失败 {tool.config_filepath}: {e}")
+        return False
+
+
+@bpy.app.handlers.persistent
+def config_load_post(*args):
+    restore_naming_config(bpy.context.scene)
+
+
+# ======================================================================================================================
+# 导出队列：导出按钮只提交任务，由定时器按时间片执行，界面保持响应，可以随时取消
+export_queue = JobQueue()
+export_window = None
+
+EXPORT_MESSAGE_LINES = 5
+EXPORT_MESSAGE_ICONS = {'ERROR': 'CANCEL', 'WARNING': 'ERROR', 'INFO': 'INFO'}
+
+
+def submit_export(context, name, steps, on_finish=None):
+    global export_window
+
+    export_window = context.window
+    job = export_queue.submit(name, steps, on_finish)
+    if not bpy.app.timers.is_registered(drain_export_queue):
+        bpy.app.timers.register(drain_export_queue, first_interval=0.0)
+    redraw_export_progress()
+    return job
+
+
+# 定时器中没有窗口上下文，使用提交任务时的窗口（已关闭时用第一个窗口）执行 bpy.ops
+def get_export_window():
+    windows = bpy.context.window_manager.windows
+    for window in windows:
+        if window == export_window:
+            return window
+    return windows[0] if windows else None
+
+
+def redraw_export_progress():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+# FBX 导出会切换到物体模式，复制导出的 transform_apply 要求物体模式并改动选择
+# 不在物体模式时暂停队列；每个时间片结束后恢复用户的选择和活动物体
+EXPORT_PAUSE_INTERVAL = 0.5
+export_paused = False
+
+
+def run_export_slice():
+    global export_paused
+
+    context = bpy.context
+    if export_queue.busy and context.mode != 'OBJECT':
+        if not export_paused:
+            export_paused = True
+            export_queue.report('WARNING', "不在物体模式，导出已暂停，回到物体模式后继续")
+        return EXPORT_PAUSE_INTERVAL
+    export_paused = False
+
+    view_layer = context.view_layer
+    selected = context.selected_objects
+    active = view_layer.objects.active
+    try:
+        return export_queue.run_slice()
+    finally:
+        if context.selected_objects != selected or view_layer.objects.active != active:
+            for obj in context.selected_objects:
+                obj.select_set(False)
+            for obj in selected:
+                try:
+                    obj.select_set(True)
+                except (ReferenceError, RuntimeError):
+                    pass
+            try:
+                view_layer.objects.active = active
+            except (ReferenceError, RuntimeError):
+                view_layer.objects.active = None
+
+
+def drain_export_queue():
+    window = get_export_window()
+    try:
+        if window is None:
+            interval = run_export_slice()
         else:
-            array0 = [chr(i) for i in range(ord('A'), ord('Z') + 1)]
-            array1 = [str(i).zfill(2) for i in range(10)]
-            for value0 in array0:
-                node0 = TreeNode(value0)
-                parent_node.add_child(node0)
-                for value1 in array1:
-                    node1 = TreeNode(value1)
-                    node0.add_child(node1)
-                    my_size_dict[nowname+value0+"_"+value1] = topic["topics"][0].get("title", {})
-
-
-# 输出树的所有路径 DFS
-def dfs(node, current_path):
-    if not node:
-        return
-    current_path.append(node.value)
-    if not node.children:
-        tree_path.append(list(current_path))
-    else:
-        for child in node.children:
-            dfs(child, current_path)
-    current_path.pop()
+            with bpy.context.temp_override(window=window):
+                interval = run_export_slice()
+    except Exception as e:
+        export_queue.report('ERROR', f"导出队列出错: {e}")
+        export_queue.cancel()
+        interval = None
+
+    redraw_export_progress()
+    return interval
+
+
+# 打开文件、撤销前取消导出，任务中引用的物体会失效
+@bpy.app.handlers.persistent
+def export_queue_cancel(*args):
+    if export_queue.busy:
+        export_queue.cancel()
+
+
+APP_HANDLERS = NAME_INDEX_HANDLERS + EXPORT_LINT_HANDLERS + (
+    (bpy.app.handlers.load_post, config_load_post),
+    (bpy.app.handlers.load_pre, export_queue_cancel),
+    (bpy.app.handlers.undo_pre, export_queue_cancel),
+    (bpy.app.handlers.redo_pre, export_queue_cancel),
+)
 
 
 # ======================================================================================================================
@@ -124,61 +303,1079 @@ def update_visibility(context):
     context.area.tag_redraw()
 
 
+# ======================================================================================================================
+# 名称搜索：索引在加载配置时建立，结果按 (查询, 索引) 缓存，绘制面板时不重复搜索
+NAME_SEARCH_LINES = 10
+name_search_key = None
+name_search_results = []
+
+
+def get_name_search_results(tool):
+    global name_search_key, name_search_results
+
+    key = (tool.name_search, core.name_search)
+    if key != name_search_key:
+        name_search_key = key
+        name_search_results = core.name_search.search(tool.name_search) if core.name_search and tool.name_search else []
+    return name_search_results
+
+
+# 按路径设置下拉菜单（只有 6 层），再直接设置当前命名
+def pick_name(context, name, path):
+    global now_name
+
+    tool = context.scene.my_tool
+    for i, value in enumerate(path[:6]):
+        try:
+            setattr(tool, f"prefix_{i}", value)
+        except TypeError:
+            break
+    now_name = name
+
+
 # 根据动态层级获取枚举值
 def get_dynamic_enum_items(level):
     def enum_items_fn(self, context):
         # ================================================
-        current_node = tree_root
+        current_node = core.tree_root
+        if not current_node:
+            return ()
+
+        tool = context.scene.my_tool
         for i in range(level):
-            selected_value = getattr(context.scene.my_tool, f"prefix_{i}", "")
-            current_node = next((child for child in current_node.children if child.value == selected_value), None)
+            selected_value = getattr(tool, f"prefix_{i}", "")
+            current_node = current_node.get_child(selected_value)
             if not current_node:
-                return []
+                return ()
 
         # ================================================
-        items = [(child.value, child.value, "") for child in current_node.children]
-        return items
+        # 返回缓存的元组，避免每次重绘都创建新列表
+        return current_node.get_enum_items()
 
     return enum_items_fn
 
 
-# 计算下一个命名
-def set_next_name(nowname):
-    # 找到最后一个下划线的位置
-    last_underscore_index = nowname.rfind('_')
+# 通用属性的数据类型 -> (foreach 属性名, 每个元素的分量数, 缓冲区类型)
+ATTRIBUTE_BUFFERS = {
+    'FLOAT': ("value", 1, np.float32),
+    'INT': ("value", 1, np.int32),
+    'INT8': ("value", 1, np.int32),
+    'BOOLEAN': ("value", 1, bool),
+    'FLOAT2': ("vector", 2, np.float32),
+    'INT32_2D': ("value", 2, np.int32),
+    'FLOAT_VECTOR': ("vector", 3, np.float32),
+    'FLOAT_COLOR': ("color", 4, np.float32),
+    'BYTE_COLOR': ("color", 4, np.float32),
+    'QUATERNION': ("value", 4, np.float32),
+    'FLOAT4X4': ("value", 16, np.float32),
+}
+
+# 单独读写的内置属性，不当作通用属性处理
+MESH_BUILTIN_ATTRIBUTES = {"position", "material_index", "sharp_face", "sharp_edge", "custom_normal"}
+
+# 边的标记，3.x 中折痕和倒角权重也在边上，4.0 起改为通用属性
+EDGE_FLAGS = ("use_seam", "use_edge_sharp")
+
+
+def get_edge_float_fields():
+    properties = bpy.types.MeshEdge.bl_rna.properties
+    return [field for field in ("crease", "bevel_weight") if field in properties]
+
+
+# 读取整个集合的一个属性
+def read_buffer(collection, attr, dtype, width=1):
+    buffer = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attr, buffer)
+    return buffer
+
+
+# 网格上需要保留的通用属性（颜色属性、自定义属性等），返回 [(属性, foreach 属性名, 分量数, 缓冲区类型)]
+# 内部属性（名字以 . 开头）、UV 和单独处理的内置属性除外
+def get_generic_attributes(mesh):
+    uv_names = {uv_layer.name for uv_layer in mesh.uv_layers}
+    attributes = []
+    for attribute in mesh.attributes:
+        name = attribute.name
+        if name.startswith(".") or name in MESH_BUILTIN_ATTRIBUTES or name in uv_names:
+            continue
+        buffer = ATTRIBUTE_BUFFERS.get(attribute.data_type)
+        if buffer:
+            attributes.append((attribute, *buffer))
+    return attributes
+
+
+# 读取网格缓冲区并写入哈希
+def hash_mesh_buffers(hasher, mesh):
+    hasher.update(read_buffer(mesh.vertices, "co", np.float32, 3).tobytes())
+    hasher.update(read_buffer(mesh.edges, "vertices", np.int32, 2).tobytes())
+    hasher.update(read_buffer(mesh.loops, "vertex_index", np.int32).tobytes())
+    hasher.update(read_buffer(mesh.polygons, "loop_total", np.int32).tobytes())
+    hasher.update(read_buffer(mesh.polygons, "material_index", np.int32).tobytes())
+    hasher.update(read_buffer(mesh.polygons, "use_smooth", bool).tobytes())
+
+    for attr in EDGE_FLAGS:
+        hasher.update(read_buffer(mesh.edges, attr, bool).tobytes())
+    for attr in get_edge_float_fields():
+        hasher.update(read_buffer(mesh.edges, attr, np.float32).tobytes())
+
+    for uv_layer in mesh.uv_layers:
+        hasher.update(uv_layer.name.encode('utf-8'))
+        hasher.update(read_buffer(uv_layer.data, "uv", np.float32, 2).tobytes())
+
+    # 面角法线包含平滑、锐边、自动平滑角度和自定义法线的结果
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    read_loop_normals(mesh, normals)
+    hasher.update(normals.tobytes())
+
+    for attribute, attr, width, dtype in get_generic_attributes(mesh):
+        hasher.update(repr((attribute.name, attribute.domain, attribute.data_type)).encode('utf-8'))
+        hasher.update(read_buffer(attribute.data, attr, dtype, width).tobytes())
+
+    if mesh.shape_keys:
+        for key_block in mesh.shape_keys.key_blocks:
+            hasher.update(repr(get_rna_values(key_block)).encode('utf-8'))
+            hasher.update(read_buffer(key_block.data, "co", np.float32, 3).tobytes())
+
+
+# 只影响界面显示的节点属性，不计入哈希
+NODE_UI_PROPERTIES = {
+    "location", "width", "width_hidden", "height", "dimensions", "select", "hide", "label", "color",
+    "use_custom_color", "show_options", "show_preview", "show_texture",
+}
+
+
+# RNA 数据的简单属性值，数组转为元组，指向数据块的属性只取名字和文件路径
+def get_rna_values(data, skip=()):
+    values = []
+    for prop in data.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier == "rna_type" or identifier in skip or prop.type == 'COLLECTION':
+            continue
+        value = getattr(data, identifier, None)
+        if prop.type == 'POINTER':
+            if isinstance(value, bpy.types.ID):
+                values.append((identifier, value.name, getattr(value, "filepath", "")))
+            continue
+        if prop.type in {'BOOLEAN', 'INT', 'FLOAT'} and prop.is_array:
+            value = tuple(value)
+        elif isinstance(value, set):
+            value = sorted(value)
+        values.append((identifier, value))
+    return values
+
+
+# 节点树的内容：节点设置、输入接口的默认值、连线，节点组递归计入
+def hash_node_tree(hasher, node_tree, visited):
+    if node_tree in visited:
+        return
+    visited.add(node_tree)
+
+    for node in node_tree.nodes:
+        hasher.update(repr((node.bl_idname, node.name, get_rna_values(node, NODE_UI_PROPERTIES))).encode('utf-8'))
+        for socket in node.inputs:
+            value = getattr(socket, "default_value", None)
+            if hasattr(value, "__len__") and not isinstance(value, str):
+                value = tuple(value)
+            hasher.update(repr((socket.identifier, value)).encode('utf-8'))
+        group = getattr(node, "node_tree", None)
+        if group:
+            hash_node_tree(hasher, group, visited)
+
+    for link in node_tree.links:
+        hasher.update(repr((link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier, link.is_muted)).encode('utf-8'))
+
+
+# 材质内容的哈希：材质设置和节点树，同一次导出中按材质缓存
+def hash_material(material, material_hashes):
+    if material is None:
+        return ""
+    content_hash = material_hashes.get(material)
+    if content_hash is None:
+        hasher = hashlib.sha1()
+        hasher.update(repr(get_rna_values(material)).encode('utf-8'))
+        if material.node_tree:
+            hash_node_tree(hasher, material.node_tree, set())
+        content_hash = material_hashes[material] = hasher.hexdigest()
+    return content_hash
+
+
+# 计算物体导出内容的哈希：网格、变换、材质、导出设置
+# 变换使用世界矩阵，包含所有旋转模式、增量变换和父级变换
+def hash_object_content(obj, context, export_mode, material_hashes=None):
+    if material_hashes is None:
+        material_hashes = {}
+    hasher = hashlib.sha1()
+
+    unit_settings = context.scene.unit_settings
+    hasher.update(repr((export_mode, sorted(FBX_EXPORT_SETTINGS.items()), unit_settings.length_unit, unit_settings.scale_length)).encode('utf-8'))
+    # 实例导出不烘焙变换，变换只写入实例表
+    if export_mode != 'INSTANCE':
+        hasher.update(repr((obj.type, [tuple(row) for row in obj.matrix_world])).encode('utf-8'))
+    hasher.update(repr([(slot.name, hash_material(slot.material, material_hashes)) for slot in obj.material_slots]).encode('utf-8'))
+
+    if obj.type == 'MESH':
+        # 有修改器时哈希修改器计算后的网格
+        if obj.modifiers:
+            eval_obj = obj.evaluated_get(context.evaluated_depsgraph_get())
+            hash_mesh_buffers(hasher, eval_obj.to_mesh())
+            eval_obj.to_mesh_clear()
+        else:
+            hash_mesh_buffers(hasher, obj.data)
+
+    return hasher.hexdigest()
+
+
+# ======================================================================================================================
+# 先导出到同目录的临时文件再替换，失败或取消时不会留下写了一半的 FBX
+def export_fbx_file(filepath, settings):
+    temp_filepath = get_temp_filepath(filepath)
+    try:
+        bpy.ops.export_scene.fbx(filepath=temp_filepath, **settings)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        remove_file(temp_filepath)
+        raise
+
+
+# 导出单个物体：复制、应用旋转缩放、导出、删除副本
+def export_object_fbx(context, obj, export_filepath):
+    obj_copy = obj.copy()
+    obj_copy.data = obj.data.copy()
+    context.collection.objects.link(obj_copy)
+
+    bpy.ops.object.select_all(action='DESELECT')
+    obj_copy.select_set(True)
+    context.view_layer.objects.active = obj_copy
+
+    # 导出失败时也删除副本
+    try:
+        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+
+        export_fbx_file(export_filepath, FBX_EXPORT_SETTINGS)
+        profile_count("bpy_ops", 3)
+    finally:
+        bpy.data.objects.remove(obj_copy, do_unlink=True)
+
+
+# 复制导出：每个物体走一遍 copy / transform_apply
+class CopyExporter:
+    def __init__(self, context):
+        self.context = context
+
+    def export(self, obj, export_filepath):
+        export_object_fbx(self.context, obj, export_filepath)
+
+    def close(self):
+        pass
+
+
+# 复制物体的网格，有修改器时使用计算后的网格
+def copy_object_mesh(obj, depsgraph):
+    if obj.modifiers:
+        return bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    return obj.data.copy()
+
+
+# 把物体的旋转缩放烘焙进一个新网格
+def bake_object_mesh(obj, depsgraph):
+    mesh = copy_object_mesh(obj, depsgraph)
+
+    rot_scale = obj.matrix_basis.to_3x3().to_4x4()
+    mesh.transform(rot_scale)
+
+    # 负缩放时翻转法线，与 transform_apply 保持一致
+    if rot_scale.determinant() < 0:
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bmesh.ops.reverse_faces(bm, faces=bm.faces)
+        bm.to_mesh(mesh)
+        bm.free()
+
+    return mesh, rot_scale
+
+
+# 数据导出：整批复用一个临时物体，放在单独的集合中按活动集合导出
+# 不修改用户的选择和活动物体
+class ScratchExporter:
+    def __init__(self, context):
+        self.context = context
+        self.depsgraph = context.evaluated_depsgraph_get()
+        self.view_layer = context.view_layer
+        self.prev_layer_collection = self.view_layer.active_layer_collection
+
+        self.collection = bpy.data.collections.new("MyTool_Export")
+        context.scene.collection.children.link(self.collection)
+        self.layer_collection = self.view_layer.layer_collection.children[self.collection.name]
+
+        self.object = bpy.data.objects.new("MyTool_Export", bpy.data.meshes.new("MyTool_Export"))
+        self.collection.objects.link(self.object)
 
-    # 提取前缀和数字部分
-    prefix = nowname[:last_underscore_index + 1]
-    number_part = nowname[last_underscore_index + 1:]
-    next_number = int(number_part) + 1
+        self.settings = dict(FBX_EXPORT_SETTINGS, use_selection=False, use_active_collection=True)
 
-    # 拼接结果字符串
-    next_string = f"{prefix}{next_number:02d}"
+    def export(self, obj, export_filepath):
+        mesh, matrix_world = self.prepare_mesh(obj)
 
-    return next_string
+        old_mesh = self.object.data
+        self.object.data = mesh
+        bpy.data.meshes.remove(old_mesh)
+        self.object.matrix_world = matrix_world
+
+        self.view_layer.active_layer_collection = self.layer_collection
+        try:
+            export_fbx_file(export_filepath, self.settings)
+            profile_count("bpy_ops")
+        finally:
+            self.view_layer.active_layer_collection = self.prev_layer_collection
+
+    def prepare_mesh(self, obj):
+        mesh, rot_scale = bake_object_mesh(obj, self.depsgraph)
+        return mesh, obj.matrix_world @ rot_scale.inverted_safe()
+
+    def close(self):
+        mesh = self.object.data
+        bpy.data.objects.remove(self.object, do_unlink=True)
+        bpy.data.meshes.remove(mesh)
+        bpy.data.collections.remove(self.collection)
+
+
+# 实例导出：网格保持局部空间放在原点，变换写入实例表
+class InstanceExporter(ScratchExporter):
+    def prepare_mesh(self, obj):
+        return copy_object_mesh(obj, self.depsgraph), Matrix.Identity(4)
+
+
+FBX_EXPORTERS = {
+    'COPY': CopyExporter,
+    'DATA': ScratchExporter,
+    'INSTANCE': InstanceExporter,
+}
+
+
+# 修改器堆栈的签名：类型和所有可写属性
+def modifier_stack_key(obj):
+    hasher = hashlib.sha1()
+    for modifier in obj.modifiers:
+        values = [modifier.type]
+        for prop in modifier.bl_rna.properties:
+            if prop.is_readonly or prop.type == 'COLLECTION':
+                continue
+
+            value = getattr(modifier, prop.identifier)
+            if prop.type == 'POINTER':
+                value = getattr(value, "name", None)
+            elif getattr(prop, "array_length", 0) > 0:
+                value = tuple(value)
+            values.append((prop.identifier, value))
+        hasher.update(repr(values).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+# 按网格数据和修改器堆栈分组，同一组只导出一次
+def group_instances(objects):
+    groups = {}
+    for obj in objects:
+        if obj.type == 'MESH':
+            key = (obj.data.as_pointer(), modifier_stack_key(obj))
+        else:
+            key = (obj.as_pointer(), "")
+        groups.setdefault(key, []).append(obj)
+
+    return [sorted(group, key=lambda obj: obj.name) for group in groups.values()]
+
+
+# 实例表的变换数组，变换为世界坐标
+def get_instance_arrays(instances, my_scale):
+    arrays = {field: [] for field, _ in LAYOUT_FIELDS}
+    for obj, _ in instances:
+        location, rotation, scale = obj.matrix_world.decompose()
+        arrays["position"].extend(location * my_scale)
+        arrays["rotation"].extend(rotation)
+        arrays["scale"].extend(scale)
+    return arrays
+
+
+# 后台 Blender 进程：导出分片内的物体或集合主体，每个任务写一行结果
+def run_fbx_worker(job_filepath, result_filepath):
+    with open(job_filepath, 'r', encoding='utf-8') as f:
+        job_data = json.load(f)
+
+    exporter = None
+    with open(result_filepath, 'w', encoding='utf-8') as result_file:
+        for job in job_data["jobs"]:
+            error = ""
+            try:
+                if job.get("kind") == "collection":
+                    collection = bpy.data.collections.get(job["name"])
+                    if collection is None:
+                        error = "快照中找不到集合"
+                    else:
+                        export_collection_main(bpy.context, collection, job["filepath"])
+                else:
+                    obj = bpy.data.objects.get(job["name"])
+                    if obj is None:
+                        error = "快照中找不到物体"
+                    else:
+                        if exporter is None:
+                            exporter = FBX_EXPORTERS[job_data["mode"]](bpy.context)
+                        exporter.export(obj, job["filepath"])
+            except Exception as e:
+                error = str(e)
+
+            result_file.write(json.dumps({"id": job["id"], "error": error}, ensure_ascii=False) + "\n")
+            result_file.flush()
+
+    if exporter is not None:
+        exporter.close()
+
+
+# 保存快照，启动多个后台 Blender 分片导出，分步收集进度和错误
+# 结果写入 results {任务 id: 错误信息}，空字符串表示成功
+def export_fbx_parallel(context, jobs, worker_count, export_mode, results):
+    temp_dir = tempfile.mkdtemp(prefix="mytool_fbx_")
+    workers = []
+
+    try:
+        snapshot_filepath = os.path.join(temp_dir, "snapshot.blend")
+        with profile_phase("save_snapshot"):
+            bpy.ops.wm.save_as_mainfile(filepath=snapshot_filepath, copy=True)
+        profile_count("bpy_ops")
+
+        for i, shard in enumerate(split_export_shards(jobs, worker_count)):
+            job_filepath = os.path.join(temp_dir, f"shard_{i}.json")
+            result_filepath = os.path.join(temp_dir, f"shard_{i}.result")
+            with open(job_filepath, 'w', encoding='utf-8') as f:
+                json.dump({"mode": export_mode, "jobs": shard}, f, ensure_ascii=False)
+            open(result_filepath, 'w').close()
+
+            process = subprocess.Popen([
+                bpy.app.binary_path, "-b", snapshot_filepath, "--factory-startup",
+                "--python", os.path.abspath(__file__), "--", "fbx-worker", job_filepath, result_filepath
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            workers.append({"process": process, "shard": shard, "result": result_filepath, "offset": 0})
+
+        # 轮询结果文件更新进度
+        running = list(workers)
+        while running:
+            yield None
+            for worker in list(running):
+                finished = worker["process"].poll() is not None
+                with open(worker["result"], 'rb') as f:
+                    f.seek(worker["offset"])
+                    for line in iter(f.readline, b""):
+                        if not line.endswith(b"\n"):
+                            break
+                        worker["offset"] += len(line)
+                        result = json.loads(line)
+                        results[result["id"]] = result["error"]
+
+                if finished:
+                    running.remove(worker)
+                    for job in worker["shard"]:
+                        if job["id"] not in results:
+                            results[job["id"]] = f"后台进程异常退出: {worker['process'].returncode}"
+
+            yield ("导出 FBX", len(results), len(jobs))
+
+    finally:
+        # 取消时结束后台进程，删除没有完成的临时文件
+        for worker in workers:
+            if worker["process"].poll() is None:
+                worker["process"].kill()
+                worker["process"].wait()
+        for job in jobs:
+            if results.get(job["id"]) != "":
+                remove_file(get_temp_filepath(job["filepath"]))
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 # ======================================================================================================================
-# 确定保存路径
-def create_path_from_name(obj_name, folder_type):
-    path_parts = obj_name.split('_')
-
-    # 如果名称中没有下划线，就直接使用该名称作为文件夹名称和子目录
-    if len(path_parts) == 1:
-        sub_dir = ''
-        folder_name = obj_name
+# 物体包围盒的世界坐标 (min, max)
+def world_bounds(obj):
+    corners = np.array(obj.bound_box, dtype=np.float64)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    world_corners = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    return world_corners.min(axis=0), world_corners.max(axis=0)
+
+
+# 批量设置原点：每个物体的新原点 = 物体位置 + world_offset，几何体保持不动
+# 共享网格的物体只平移一次顶点，偏移按 objects 中第一个使用者计算
+def shift_origins(objects, world_offset):
+    mesh_users = {}
+    for obj in objects:
+        if obj.type == 'MESH':
+            mesh_users.setdefault(obj.data, []).append(obj)
+
+    if not mesh_users:
+        return 0
+
+    # 网格还被其他物体使用时，补全使用者，保证它们的几何体也不动
+    if any(mesh.users > len(users) for mesh, users in mesh_users.items()):
+        known_objects = set(objects)
+        for obj in bpy.data.objects:
+            users = mesh_users.get(obj.data)
+            if users is not None and obj not in known_objects:
+                users.append(obj)
+
+    # 世界偏移统一转换到各网格的局部空间
+    meshes = list(mesh_users)
+    linear = np.array([mesh_users[mesh][0].matrix_world.to_3x3() for mesh in meshes], dtype=np.float64)
+    world_offset = np.asarray(world_offset, dtype=np.float64)
+    local_offsets = np.linalg.pinv(linear) @ world_offset
+
+    for mesh, local_offset in zip(meshes, local_offsets):
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        co = co.reshape(-1, 3)
+        co -= local_offset.astype(np.float32)
+        mesh.vertices.foreach_set("co", co.ravel())
+        mesh.update()
+
+        translation = Matrix.Translation(Vector(local_offset))
+        for obj in mesh_users[mesh]:
+            obj.matrix_world = obj.matrix_world @ translation
+
+    return len(meshes)
+
+
+# ======================================================================================================================
+# 集合导出：主体合并为一个 FBX，装饰物写入布局
+def get_main_objects(collection):
+    return [obj for obj in collection.objects if not is_layout_object(obj)]
+
+
+# 合并后的原点即最后一个主体的位置（与原先 join 保留活动物体的原点一致）
+def get_main_location(main_objects):
+    return main_objects[-1].location.copy()
+
+
+# 每个面角的法线，4.1 起改为 corner_normals
+def read_loop_normals(mesh, normals):
+    if hasattr(mesh, "calc_normals_split"):
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
     else:
-        sub_dir = os.path.join(*path_parts[:-1])
-        folder_name = '_'.join(path_parts[:-1])
+        mesh.corner_normals.foreach_get("vector", normals)
+
+
+# 需要保留面角法线：自动平滑（锐边）或自定义法线，4.1 起总是保留
+def needs_loop_normals(mesh):
+    return getattr(mesh, "use_auto_smooth", True) or mesh.has_custom_normals
+
+
+# 负缩放时翻转面的朝向：每个面保留第一个面角，其余倒序
+# 返回面角顶点的新顺序和面角边的新顺序（面角 i 的边连接顶点 i 和 i + 1，翻转后改用原先第 n - 1 - i 条）
+def flip_loop_order(loop_start, loop_count):
+    start = np.repeat(loop_start, loop_count)
+    count = np.repeat(loop_count, loop_count)
+    corner = np.arange(len(start)) - np.repeat(np.cumsum(loop_count) - loop_count, loop_count)
+
+    order = np.arange(len(start))
+    order[start + corner] = start + np.where(corner == 0, 0, count - corner)
+    edge_order = np.arange(len(start))
+    edge_order[start + corner] = start + count - 1 - corner
+    return order, edge_order
+
+
+# 把多个网格直接写入一个新网格：一次读取顶点、边、面角、面、UV 和通用属性的缓冲区，按矩阵批量变换
+# sources 为 [(物体, 网格, 4x4 矩阵)]，材质按出现顺序合并，面的材质下标重新映射
+# 边连同接缝、锐边、折痕一起复制，颜色属性和自定义属性按名字合并，缺少的网格与 join 一样颜色填白色，其余填 0
+def build_merged_mesh(name, sources):
+    vertex_total = sum(len(mesh.vertices) for _, mesh, _ in sources)
+    edge_total = sum(len(mesh.edges) for _, mesh, _ in sources)
+    loop_total = sum(len(mesh.loops) for _, mesh, _ in sources)
+    polygon_total = sum(len(mesh.polygons) for _, mesh, _ in sources)
+    domain_sizes = {'POINT': vertex_total, 'EDGE': edge_total, 'CORNER': loop_total, 'FACE': polygon_total}
+
+    uv_names = []
+    # 名字 -> (值域, 数据类型, foreach 属性名, 合并后的缓冲区)
+    attributes = {}
+    for _, mesh, _ in sources:
+        for uv_layer in mesh.uv_layers:
+            if uv_layer.name not in uv_names:
+                uv_names.append(uv_layer.name)
+        for attribute, attr, width, dtype in get_generic_attributes(mesh):
+            if attribute.name not in attributes and attribute.domain in domain_sizes:
+                fill = 1 if attribute.data_type in {'FLOAT_COLOR', 'BYTE_COLOR'} else 0
+                buffer = np.full((domain_sizes[attribute.domain], width), fill, dtype=dtype)
+                attributes[attribute.name] = (attribute.domain, attribute.data_type, attr, buffer)
+    use_normals = any(needs_loop_normals(mesh) for _, mesh, _ in sources)
+    edge_float_fields = get_edge_float_fields()
+
+    # 合并结果预先分配，每个网格的数据直接读入对应的区段
+    co = np.empty((vertex_total, 3), dtype=np.float32)
+    edge_vertices = np.empty((edge_total, 2), dtype=np.int32)
+    edge_flags = {attr: np.empty(edge_total, dtype=bool) for attr in EDGE_FLAGS}
+    edge_floats = {attr: np.empty(edge_total, dtype=np.float32) for attr in edge_float_fields}
+    vertex_index = np.empty(loop_total, dtype=np.int32)
+    edge_index = np.empty(loop_total, dtype=np.int32)
+    loop_start = np.empty(polygon_total, dtype=np.int32)
+    loop_count = np.empty(polygon_total, dtype=np.int32)
+    material_index = np.empty(polygon_total, dtype=np.int32)
+    use_smooth = np.empty(polygon_total, dtype=bool)
+    uvs = {uv_name: np.zeros((loop_total, 2), dtype=np.float32) for uv_name in uv_names}
+    normals = np.empty((loop_total, 3), dtype=np.float32) if use_normals else None
+
+    materials = []
+    vertex_offset = edge_offset = loop_offset = polygon_offset = 0
+    for obj, mesh, matrix in sources:
+        vertex_end = vertex_offset + len(mesh.vertices)
+        edge_end = edge_offset + len(mesh.edges)
+        loop_end = loop_offset + len(mesh.loops)
+        polygon_end = polygon_offset + len(mesh.polygons)
+        edges = slice(edge_offset, edge_end)
+        loops = slice(loop_offset, loop_end)
+        polygons = slice(polygon_offset, polygon_end)
+        domains = {'POINT': slice(vertex_offset, vertex_end), 'EDGE': edges, 'CORNER': loops, 'FACE': polygons}
+
+        matrix = np.array(matrix, dtype=np.float64)
+        linear = matrix[:3, :3]
+
+        block = co[vertex_offset:vertex_end]
+        mesh.vertices.foreach_get("co", block.ravel())
+        block[:] = block @ linear.T + matrix[:3, 3]
+
+        mesh.edges.foreach_get("vertices", edge_vertices[edges].ravel())
+        edge_vertices[edges] += vertex_offset
+        for attr, values in edge_flags.items():
+            mesh.edges.foreach_get(attr, values[edges])
+        for attr, values in edge_floats.items():
+            mesh.edges.foreach_get(attr, values[edges])
+
+        mesh.loops.foreach_get("vertex_index", vertex_index[loops])
+        vertex_index[loops] += vertex_offset
+        mesh.loops.foreach_get("edge_index", edge_index[loops])
+        edge_index[loops] += edge_offset
+        mesh.polygons.foreach_get("loop_start", loop_start[polygons])
+        mesh.polygons.foreach_get("loop_total", loop_count[polygons])
+        mesh.polygons.foreach_get("use_smooth", use_smooth[polygons])
+
+        for uv_layer in mesh.uv_layers:
+            uv_layer.data.foreach_get("uv", uvs[uv_layer.name][loops].ravel())
+
+        for attribute, attr, _, _ in get_generic_attributes(mesh):
+            domain, data_type, _, buffer = attributes.get(attribute.name, (None, None, None, None))
+            if domain == attribute.domain and data_type == attribute.data_type:
+                attribute.data.foreach_get(attr, buffer[domains[domain]].ravel())
+
+        if use_normals:
+            block = normals[loops]
+            read_loop_normals(mesh, block.ravel())
+            block[:] = block @ np.linalg.inv(linear)
+            block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+
+        # 物体的材质槽映射到合并后的材质列表
+        remap = []
+        for slot in obj.material_slots:
+            if slot.material not in materials:
+                materials.append(slot.material)
+            remap.append(materials.index(slot.material))
+        block = material_index[polygons]
+        mesh.polygons.foreach_get("material_index", block)
+        if remap:
+            block[:] = np.asarray(remap, dtype=np.int32)[np.clip(block, 0, len(remap) - 1)]
+        else:
+            block[:] = 0
+
+        if np.linalg.det(linear) < 0:
+            order, edge_order = flip_loop_order(loop_start[polygons], loop_count[polygons])
+            order += loop_offset
+            edge_order += loop_offset
+            vertex_index[loops] = vertex_index[order]
+            edge_index[loops] = edge_index[edge_order]
+            for uv in uvs.values():
+                uv[loops] = uv[order]
+            for domain, _, _, buffer in attributes.values():
+                if domain == 'CORNER':
+                    buffer[loops] = buffer[order]
+            if use_normals:
+                normals[loops] = normals[order]
+
+        loop_start[polygons] += loop_offset
+        vertex_offset, edge_offset, loop_offset, polygon_offset = vertex_end, edge_end, loop_end, polygon_end
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(vertex_total)
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.edges.add(edge_total)
+    mesh.edges.foreach_set("vertices", edge_vertices.ravel())
+    # 全为默认值的标记不写，避免新建空的属性层
+    for attr, values in edge_flags.items():
+        if values.any():
+            mesh.edges.foreach_set(attr, values)
+    for attr, values in edge_floats.items():
+        if values.any():
+            mesh.edges.foreach_set(attr, values)
+    mesh.loops.add(loop_total)
+    mesh.loops.foreach_set("vertex_index", vertex_index)
+    mesh.loops.foreach_set("edge_index", edge_index)
+    mesh.polygons.add(polygon_total)
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    # 4.0 起面角数量由 loop_start 推算
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", loop_count)
+    mesh.polygons.foreach_set("material_index", material_index)
+    mesh.polygons.foreach_set("use_smooth", use_smooth)
+
+    for uv_name in uv_names:
+        mesh.uv_layers.new(name=uv_name).data.foreach_set("uv", uvs[uv_name].ravel())
+    for attribute_name, (domain, data_type, attr, buffer) in attributes.items():
+        attribute = mesh.attributes.get(attribute_name) or mesh.attributes.new(attribute_name, data_type, domain)
+        attribute.data.foreach_set(attr, buffer.ravel())
+    for material in materials:
+        mesh.materials.append(material)
+
+    mesh.update()
+    if use_normals:
+        if hasattr(mesh, "use_auto_smooth"):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set(normals)
+
+    profile_count("vertices_merged", vertex_total)
+    return mesh
+
+
+# 合并集合主体的网格：与 join + transform_apply(rotation, scale) 结果一致，原点在最后一个主体的位置
+# 活动物体（最后一个主体）的网格和材质排在最前面，有修改器时使用计算后的网格
+# 不处理形态键，带形态键的集合由 export_collection_joined 合并
+def merge_main_meshes(main_objects, depsgraph):
+    origin = main_objects[-1].matrix_world.translation
+    to_origin = Matrix.Translation(-origin)
+
+    mesh_objects = [obj for obj in main_objects if obj.type == 'MESH']
+    if not mesh_objects:
+        raise ValueError("集合中没有网格主体")
+    mesh_objects = mesh_objects[-1:] + mesh_objects[:-1]
+
+    evaluated_objects = []
+    try:
+        sources = []
+        for obj in mesh_objects:
+            if obj.modifiers:
+                eval_obj = obj.evaluated_get(depsgraph)
+                evaluated_objects.append(eval_obj)
+                mesh = eval_obj.to_mesh()
+            else:
+                mesh = obj.data
+            sources.append((obj, mesh, to_origin @ obj.matrix_world))
 
-    full_path = os.path.join(
-        sub_dir, folder_name, folder_type
-    )
+        return build_merged_mesh(main_objects[-1].name, sources), origin.copy()
+    finally:
+        for eval_obj in evaluated_objects:
+            eval_obj.to_mesh_clear()
+
+
+# 形态键需要按名字合并并随变换烘焙，这种集合仍用 join 合并：主体的副本放在临时集合中，导出后删除
+def export_collection_joined(context, main_objects, fbx_filepath):
+    view_layer = context.view_layer
+    export_collection = bpy.data.collections.new("MyTool_Export")
+    context.scene.collection.children.link(export_collection)
+    try:
+        object_copies = []
+        for obj in main_objects:
+            if obj.type == 'MESH':
+                obj_copy = obj.copy()
+                obj_copy.data = obj.data.copy()
+                export_collection.objects.link(obj_copy)
+                object_copies.append(obj_copy)
+
+        bpy.ops.object.select_all(action='DESELECT')
+        for obj_copy in object_copies:
+            obj_copy.select_set(True)
+        view_layer.objects.active = object_copies[-1]
+
+        bpy.ops.object.join()
+        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+        export_fbx_file(fbx_filepath, FBX_EXPORT_SETTINGS)
+        profile_count("bpy_ops", 4)
+    finally:
+        for obj in list(export_collection.objects):
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if mesh is not None and mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+        bpy.data.collections.remove(export_collection)
+
+
+# 合并主体网格后导出：临时物体放在单独的集合中按活动集合导出，不修改用户的选择
+def export_collection_main(context, collection, fbx_filepath):
+    main_objects = get_main_objects(collection)
+    if not main_objects:
+        raise ValueError(f"集合中没有主体物体: {collection.name}")
+
+    if any(obj.type == 'MESH' and obj.data.shape_keys for obj in main_objects):
+        with profile_phase("join_meshes"):
+            export_collection_joined(context, main_objects, fbx_filepath)
+        return
+
+    with profile_phase("merge_meshes"):
+        mesh, origin = merge_main_meshes(main_objects, context.evaluated_depsgraph_get())
+
+    view_layer = context.view_layer
+    prev_layer_collection = view_layer.active_layer_collection
+    export_collection = bpy.data.collections.new("MyTool_Export")
+    context.scene.collection.children.link(export_collection)
+    merged_object = bpy.data.objects.new(main_objects[-1].name, mesh)
+    export_collection.objects.link(merged_object)
+    merged_object.matrix_world = Matrix.Translation(origin)
+
+    view_layer.active_layer_collection = view_layer.layer_collection.children[export_collection.name]
+    try:
+        export_fbx_file(fbx_filepath, dict(FBX_EXPORT_SETTINGS, use_selection=False, use_active_collection=True))
+        profile_count("bpy_ops")
+    finally:
+        view_layer.active_layer_collection = prev_layer_collection
+        bpy.data.objects.remove(merged_object, do_unlink=True)
+        bpy.data.meshes.remove(mesh)
+        bpy.data.collections.remove(export_collection)
+
+
+# 装饰物布局数据的生成器，每次调用重新遍历物体
+def layout_sources(layout_objects, main_location, my_scale):
+    layout_values = {
+        "position": lambda: ((obj.location - main_location) * my_scale for obj in layout_objects),
+        "rotation": lambda: (obj.matrix_basis.decompose()[1] for obj in layout_objects),
+        "scale": lambda: (obj.scale for obj in layout_objects),
+    }
+    return lambda: (obj.name for obj in layout_objects), lambda field: layout_values[field]()
+
+
+# 按稳定 id 整理装饰物：缺少或重复的 id 重新分配并写回物体，按快照顺序返回 (物体, id)
+def get_layout_items(collection, base):
+    layout_objects = [obj for obj in collection.objects if is_layout_object(obj)]
+    names = [obj.name for obj in layout_objects]
+    ids = assign_layout_ids(names, [obj.get(LAYOUT_ID_PROPERTY) for obj in layout_objects], base)
 
-    if not os.path.exists(full_path):
-        os.makedirs(full_path)
+    for obj, item_id in zip(layout_objects, ids):
+        if obj.get(LAYOUT_ID_PROPERTY) != item_id:
+            obj[LAYOUT_ID_PROPERTY] = item_id
 
-    return full_path
+    order = order_layout_items(ids, names, base)
+    return [layout_objects[i] for i in order], [ids[i] for i in order]
+
+
+# ======================================================================================================================
+# 导出流程：面板按钮和命令行共用，信息通过 report(级别, 内容) 输出
+
+# 检查物体名称，返回合法的物体
+def validate_objects(objects, report):
+    with profile_phase("validate"):
+        legal, illegal = check_names([obj.name for obj in objects], core.legal_names)
+    for this_name, closest in illegal:
+        report('ERROR', f"物体名称非法: {this_name}，最接近的合法前缀: {closest}")
+
+    legal = set(legal)
+    return [obj for obj in objects if obj.name in legal]
+
+
+# 以下导出流程是生成器，面板按钮提交到导出队列分步执行，命令行用 run_steps 一次执行完
+
+# 导出物体 FBX，跳过未修改的物体，返回 (导出数量, 跳过数量, 失败数量)
+def export_fbx_steps(context, objects, prefix, export_mode, worker_count, force_export, report):
+    # 设置全局单位
+    context.scene.unit_settings.length_unit = 'METERS'
+    context.scene.unit_settings.scale_length = 0.5
+
+    if not os.path.exists(prefix):
+        os.makedirs(prefix)
+
+    manifest = load_fbx_manifest(prefix)
+
+    def get_export_filepath(obj):
+        export_filepath = get_fbx_filepath(prefix, obj.name)
+        ensure_parent_dir(export_filepath)
+        return export_filepath
+
+    # 确定导出文件，同名物体只导出最后一个
+    # 实例导出时每组共享网格只导出名字最小的物体
+    with profile_phase("plan_files"):
+        export_objects = {}
+        instances = []
+        # 不同网格但基础名字相同的物体（普通复制）与原先一样共用同一个文件
+        if export_mode == 'INSTANCE':
+            meshes = []
+            mesh_indices = {}
+            for group in group_instances(objects):
+                export_filepath = get_export_filepath(group[0])
+                if export_filepath not in mesh_indices:
+                    export_objects[export_filepath] = group[0]
+                    mesh_indices[export_filepath] = len(meshes)
+                    meshes.append(get_manifest_key(prefix, export_filepath))
+                instances.extend((obj, mesh_indices[export_filepath]) for obj in group)
+        else:
+            for obj in objects:
+                export_objects[get_export_filepath(obj)] = obj
+
+    # 跳过未修改的物体
+    # 以下两个阶段会分步执行，用 profile_steps 计时，只记录步骤本身的耗时
+    def hash_steps():
+        jobs = []
+        skipped_count = 0
+        material_hashes = {}
+        for i, (export_filepath, obj) in enumerate(export_objects.items()):
+            yield ("检查修改", i, len(export_objects))
+            manifest_key = get_manifest_key(prefix, export_filepath)
+            content_hash = hash_object_content(obj, context, export_mode, material_hashes)
+            if not force_export and manifest.get(manifest_key) == content_hash and os.path.exists(export_filepath):
+                skipped_count += 1
+                continue
+
+            cost = len(obj.data.vertices) if obj.type == 'MESH' else 1
+            jobs.append({"id": obj.name, "name": obj.name, "filepath": export_filepath, "key": manifest_key, "hash": content_hash, "cost": cost})
+        return jobs, skipped_count
+
+    jobs, skipped_count = yield from profile_steps("hash", hash_steps())
+
+    # 遍历导出物体，单个物体失败不影响其他物体
+    results = {}
+    worker_count = min(worker_count, len(jobs))
+
+    def export_steps():
+        if worker_count > 1:
+            yield from export_fbx_parallel(context, jobs, worker_count, export_mode, results)
+            return
+
+        exporter = FBX_EXPORTERS[export_mode](context)
+        try:
+            for i, job in enumerate(jobs):
+                yield ("导出 FBX", i, len(jobs))
+                try:
+                    exporter.export(bpy.data.objects[job["name"]], job["filepath"])
+                    results[job["id"]] = ""
+                except Exception as e:
+                    results[job["id"]] = str(e)
+        finally:
+            exporter.close()
+
+    try:
+        yield from profile_steps("export_fbx", export_steps())
+    finally:
+        # 取消时也记录已经导出的文件，下次不再重复导出
+        exported_count = 0
+        for job in jobs:
+            if results.get(job["id"]) == "":
+                manifest[job["key"]] = job["hash"]
+                exported_count += 1
+                profile_count("bytes_written", os.path.getsize(job["filepath"]))
+
+        with profile_phase("manifest"):
+            save_fbx_manifest(prefix, manifest)
+
+    for job in jobs:
+        error = results.get(job["id"], "未导出")
+        if error:
+            report('ERROR', f"导出失败 {job['name']}: {error}")
+
+    profile_count("objects_scanned", len(objects))
+    profile_count("objects_exported", exported_count)
+
+    if export_mode == 'INSTANCE':
+        instance_filepath = os.path.join(prefix, "Instances", "instances.json")
+        with profile_phase("instance_table"):
+            arrays = get_instance_arrays(instances, context.scene.unit_settings.scale_length)
+            names = [obj.name for obj, _ in instances]
+            total = write_instance_table(instance_filepath, names, meshes, [mesh_index for _, mesh_index in instances], arrays)
+        report('INFO', f"实例 {len(instances)} 个，网格 {len(meshes)} 个，实例表共 {total} 个")
+
+    return exported_count, skipped_count, len(jobs) - exported_count
+
+
+# 导出多个集合：FBX 在当前进程或后台进程中生成，布局在线程池中写入
+# chunking 为 {"mode", "cell_size", "capacity"} 时另外写入分块布局
+# 返回 (集合数量, 装饰物数量, 失败数量)
+def export_collection_steps(context, collections, prefix, worker_count, export_mode, report, chunking=None):
+    my_scale = context.scene.unit_settings.scale_length
+
+    # 规划所有集合
+    plans = []
+    for collection in collections:
+        main_objects = get_main_objects(collection)
+        if not main_objects:
+            continue
+
+        fbx_filepath, json_filepath = get_collection_filepaths(prefix, collection.name)
+        ensure_parent_dir(fbx_filepath)
+
+        plans.append({
+            "collection": collection,
+            "fbx": fbx_filepath,
+            "json": json_filepath,
+            "main_location": get_main_location(main_objects),
+            "cost": sum(len(obj.data.vertices) for obj in main_objects if obj.type == 'MESH') or 1,
+        })
+
+    if not plans:
+        return 0, 0, 0
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(8, len(plans))) as pool:
+        # 布局数据在主线程读取，写文件和生成补丁交给线程池
+        # 每个集合的快照、名字、id 和变换数组同时在内存中，占用与装饰物数量成正比
+        layout_futures = []
+        chunk_futures = []
+        for i, plan in enumerate(plans):
+            yield ("读取布局", i, len(plans))
+            base, base_hash = read_layout_snapshot(plan["json"])
+            layout_objects, ids = get_layout_items(plan["collection"], base)
+            names, arrays = collect_layout(*layout_sources(layout_objects, plan["main_location"], my_scale))
+            layout_futures.append((plan, pool.submit(write_layout_with_patch, plan["json"], ids, names, arrays, base, base_hash)))
+            if chunking:
+                chunk_futures.append((plan, pool.submit(write_layout_chunks, plan["json"], ids, names, arrays, **chunking)))
+
+        # 主体 FBX
+        jobs = [{
+            "id": "collection/" + plan["collection"].name,
+            "kind": "collection",
+            "name": plan["collection"].name,
+            "filepath": plan["fbx"],
+            "cost": plan["cost"],
+        } for plan in plans]
+
+        results = {}
+        worker_count = min(worker_count, len(jobs))
+        if worker_count > 1:
+            yield from export_fbx_parallel(context, jobs, worker_count, export_mode, results)
+        else:
+            for i, job in enumerate(jobs):
+                yield ("导出集合", i, len(jobs))
+                try:
+                    export_collection_main(context, bpy.data.collections[job["name"]], job["filepath"])
+                    results[job["id"]] = ""
+                except Exception as e:
+                    results[job["id"]] = str(e)
+
+        for job in jobs:
+            if results.get(job["id"], "未导出"):
+                errors.append(f"{job['name']} FBX: {results.get(job['id'], '未导出')}")
+
+        item_count = 0
+        patch_count = 0
+        patch_totals = [0, 0, 0]
+        for plan, future in layout_futures:
+            try:
+                count, patch = future.result()
+            except Exception as e:
+                errors.append(f"{plan['collection'].name} Json: {e}")
+                continue
+
+            item_count += count
+            if patch is not None:
+                patch_count += 1
+                patch_totals = [total + value for total, value in zip(patch_totals, patch_stats(patch))]
+
+        chunk_count = 0
+        for plan, future in chunk_futures:
+            try:
+                chunk_count += future.result()
+            except Exception as e:
+                errors.append(f"{plan['collection'].name} 分块: {e}")
+
+    for error in errors:
+        report('ERROR', error)
+    if patch_count:
+        report('INFO', f"布局补丁 {patch_count} 个：新增 {patch_totals[0]}，删除 {patch_totals[1]}，移动 {patch_totals[2]}")
+    if chunk_count:
+        report('INFO', f"分块布局 {chunk_count} 块")
+    return len(plans), item_count, len(errors)
 
 
 # ======================================================================================================================
@@ -240,7 +1437,90 @@ class MyProperties(bpy.types.PropertyGroup):
         min=0.0,
         max=1.0
     )
+
+    # 忽略导出缓存
+    force_export: bpy.props.BoolProperty(
+        name="force_export",
+        default=False
+    )
+
+    # 导出方式
+    export_mode: bpy.props.EnumProperty(
+        name="导出方式",
+        items=[
+            ('COPY', "复制导出", "复制物体并应用变换后导出"),
+            ('DATA', "数据导出", "将旋转缩放烘焙到临时网格后导出，不修改选择"),
+            ('INSTANCE', "实例导出", "共享网格只导出一次，变换写入实例表"),
+        ],
+        default='COPY'
+    )
+
+    # 批量导出的集合名过滤，支持通配符
+    batch_filter: bpy.props.StringProperty(
+        name="集合过滤",
+        default="*"
+    )
+
+    # 并行导出进程数，1 为在当前进程中导出
+    export_workers: bpy.props.IntProperty(
+        name="并行进程",
+        default=1,
+        min=1,
+        max=64
+    )
+
+    # 分块布局
+    layout_chunking: bpy.props.EnumProperty(
+        name="布局分块",
+        items=[
+            ('NONE', "不分块", "只写入完整布局"),
+            ('GRID', "网格", "按 XY 平面的均匀网格分块，另外写入分块文件和索引"),
+            ('OCTREE', "八叉树", "按八叉树分块，每块不超过设定数量，另外写入分块文件和索引"),
+        ],
+        default='NONE'
+    )
+
+    # 网格边长（导出后的单位）
+    layout_chunk_size: bpy.props.FloatProperty(
+        name="网格边长",
+        default=50.0,
+        min=0.01
+    )
+
+    # 八叉树每块的最多装饰物数量
+    layout_chunk_capacity: bpy.props.IntProperty(
+        name="每块数量",
+        default=1024,
+        min=1
+    )
+
+    # 命名配置表路径，保存在 .blend 中
+    config_filepath: bpy.props.StringProperty(
+        name="命名配置表",
+        subtype="FILE_PATH",
+        default=""
+    )
+
+    # 性能记录
+    profile_enabled: bpy.props.BoolProperty(
+        name="profile_enabled",
+        default=False
+    )
+
+    # 性能记录保存位置，为空时使用系统临时文件夹
+    profile_dirpath: bpy.props.StringProperty(
+        name="记录位置",
+        subtype="DIR_PATH",
+        default=""
+    )
     # ==================================================================================================================
+    # 名称搜索，输入时实时更新结果
+    name_search: bpy.props.StringProperty(
+        name="搜索名称",
+        default="",
+        options={'TEXTEDIT_UPDATE'},
+        update=lambda self, context: get_name_search_results(self)
+    )
 
     prefix_0: bpy.props.EnumProperty(
         name="Prefix-0",
@@ -279,6 +1559,47 @@ class MyProperties(bpy.types.PropertyGroup):
     )
 
 
+# ======================================================================================================================
+# 性能分析：勾选后记录 execute 的各阶段和计数，trace 写入指定文件夹（默认为系统临时文件夹），摘要输出到报告
+# execute 提交了导出任务时，记录到任务结束为止，摘要输出到导出队列
+def profiled(execute):
+    def wrapper(self, context):
+        props = context.scene.my_tool
+        if not props.profile_enabled:
+            return execute(self, context)
+
+        idname = self.bl_idname
+        trace_dirpath = bpy.path.abspath(props.profile_dirpath) if props.profile_dirpath else tempfile.gettempdir()
+        submitted = export_queue.submitted
+
+        profiler = start_profiling(idname)
+        try:
+            with profile_phase(idname):
+                return execute(self, context)
+        finally:
+            if export_queue.submitted != submitted:
+                export_queue.last_job["on_done"].append(lambda: finish_profiling(profiler, trace_dirpath, idname, export_queue.report))
+            else:
+                finish_profiling(profiler, trace_dirpath, idname, lambda level, message: self.report({level}, message))
+
+    return wrapper
+
+
+def finish_profiling(profiler, trace_dirpath, name, report):
+    if core.profiler is profiler:
+        stop_profiling()
+
+    trace_filepath = os.path.join(trace_dirpath, f"mytool_{name.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    for line in profiler.summary():
+        report('INFO', line)
+    try:
+        ensure_parent_dir(trace_filepath)
+        profiler.write_trace(trace_filepath)
+        report('INFO', f"性能记录已保存: {trace_filepath}")
+    except OSError as e:
+        report('WARNING', f"性能记录保存失败: {e}")
+
+
 # ======================================================================================================================
 # 加载文件
 class JsonLoader(bpy.types.Operator):
@@ -287,23 +1608,20 @@ class JsonLoader(bpy.types.Operator):
 
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
 
+    @profiled
     def execute(self, context):
-        global tree_root, tree_path
-
         if not self.filepath:
             self.report({'ERROR'}, "未选中物体")
             return {'CANCELLED'}
 
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-                self.report({'INFO'}, "JSON 文件导入成功")
-
-                tree_root = parse_json_to_tree(json_data)
-                # dfs(tree_root, [])
-                # self.report({'INFO'}, f"{tree_path}")
+            from_cache = load_naming_config(self.filepath, get_config_cache_dirpath())
+            context.scene.my_tool.config_filepath = self.filepath
+            self.report({'INFO'}, "JSON 文件导入成功（缓存）" if from_cache else "JSON 文件导入成功")
+            # dfs(core.tree_root, [])
+            # self.report({'INFO'}, f"{core.tree_path}")
 
-                update_visibility(context)
+            update_visibility(context)
 
         except Exception as e:
             self.report({'ERROR'}, f"Failed to load JSON file: {e}")
@@ -322,6 +1640,10 @@ class NameSetter(bpy.types.Operator):
     bl_label = "设置名字"
     bl_idname = "object.set_name"
 
+    # 不记住上次的值，否则点过“预览”后“命名”也只会预览
+    dry_run: bpy.props.BoolProperty(default=False, options={'SKIP_SAVE'})
+
+    @profiled
     def execute(self, context):
         global now_name, if_sync0
 
@@ -331,31 +1653,91 @@ class NameSetter(bpy.types.Operator):
             self.report({'WARNING'}, "未选中物体")
             return {'CANCELLED'}
 
-        # 设置同名物体
-        if if_sync0:
-            name_groups = defaultdict(list)
-            # 遍历所有物体，获取基础名字
-            for obj in bpy.data.objects:
-                base_name = re.split(r'\.\d{3}', obj.name)[0]
-                name_groups[base_name].append(obj)
+        # 计划重命名，编号被计划外的物体占用时跳过
+        def is_used(name, renamed):
+            return any(obj not in renamed for obj in name_index.get_objects(name))
+
+        try:
+            with profile_phase("plan_renames"):
+                plan = plan_renames(now_name, selected_objects, name_index.get_objects, is_used, if_sync0)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        if self.dry_run:
+            for obj, name in plan:
+                self.report({'INFO'}, f"{obj.name} -> {name}")
+            return {'FINISHED'}
+
+        # 先改为临时名字，避免计划内的名字互相占用
+        with profile_phase("apply_names"):
+            for i, (obj, name) in enumerate(plan):
+                obj.name = f"__mytool_rename_{i}"
+
+            for obj, name in plan:
+                obj.name = name
+                name_index.touch(obj)
+        profile_count("objects_renamed", len(plan))
+
+        return {'FINISHED'}
+
+
+# 输出命名统计
+class NameIndexStats(bpy.types.Operator):
+    bl_label = "命名统计"
+    bl_idname = "object.name_index_stats"
+
+    def execute(self, context):
+        stats = name_index.stats()
+        self.report({'INFO'}, f"物体 {stats['objects']} 个，基础名字 {stats['groups']} 组")
+        for base_name, size in stats["largest"]:
+            self.report({'INFO'}, f"{base_name}: {size}")
+        return {'FINISHED'}
+
+
+# 检查导出：名称、同名物体、分类、基准物体变换、缩放
+class ExportLinter(bpy.types.Operator):
+    bl_label = "检查导出"
+    bl_idname = "object.lint_export"
+
+    @profiled
+    def execute(self, context):
+        global lint_summary
+
+        if core.legal_names is None:
+            self.report({'ERROR'}, "未选择 JSON 文件")
+            return {'CANCELLED'}
+
+        result = run_export_lint()
+        error_count, warning_count = report_lint(result, lambda level, message: self.report({level}, message), LINT_REPORT_LINES)
+        lint_summary = f"网格物体 {result['objects']} 个，错误 {error_count} 项，警告 {warning_count} 项"
+        self.report({'WARNING'} if error_count else {'INFO'}, f"{lint_summary}（重新检查 {result['checked']} 个）")
+        return {'FINISHED'}
+
 
-            # 遍历选中物体，设置同名物体
-            for selected_object in selected_objects:
-                base_name = re.split(r'\.\d{3}', selected_object.name)[0]
+# 选择搜索结果
+class NamePicker(bpy.types.Operator):
+    bl_label = "选择名称"
+    bl_idname = "object.pick_name"
 
-                # 获取具有相同基名的所有物体
-                same_base_objects = name_groups.get(base_name, [])
+    index: bpy.props.IntProperty(default=0)
 
-                nowname = now_name
-                for obj in same_base_objects:
-                    if obj not in selected_objects:
-                        nowname = set_next_name(nowname)
-                        obj.name = nowname
+    @classmethod
+    def description(cls, context, properties):
+        results = get_name_search_results(context.scene.my_tool)
+        if 0 <= properties.index < len(results):
+            return " / ".join(results[properties.index][1])
+        return cls.bl_label
 
-        # 设置选中物体
-        for obj in selected_objects:
-            obj.name = now_name
+    def execute(self, context):
+        results = get_name_search_results(context.scene.my_tool)
+        if not 0 <= self.index < len(results):
+            self.report({'WARNING'}, "搜索结果已过期")
+            return {'CANCELLED'}
 
+        name, path = results[self.index]
+        pick_name(context, name, path)
+        context.area.tag_redraw()
         return {'FINISHED'}
 
 
@@ -402,6 +1784,7 @@ class CenterSetter(bpy.types.Operator):
     bl_label = "设置选中物体中心"
     bl_idname = "object.set_center"
 
+    @profiled
     def execute(self, context):
         # 初始化
         props = context.scene.my_tool
@@ -423,57 +1806,26 @@ class CenterSetter(bpy.types.Operator):
         selected_object = selected_objects[0]
 
         # 计算偏移量
-        bbox_corners = []
-        for corner in selected_object.bound_box:
-            corner = selected_object.matrix_world @ Vector(corner)
-            bbox_corners.append(corner)
-
-        min_x, min_y, min_z = float('inf'), float('inf'), float('inf')
-        max_x, max_y, max_z = float('-inf'), float('-inf'), float('-inf')
-
-        for corner in bbox_corners:
-            min_x, min_y, min_z = min(min_x, corner.x), min(min_y, corner.y), min(min_z, corner.z)
-            max_x, max_y, max_z = max(max_x, corner.x), max(max_y, corner.y), max(max_z, corner.z)
+        with profile_phase("bounds"):
+            bbox_min, bbox_max = world_bounds(selected_object)
+        interp = np.array((my_interp_x, my_interp_y, my_interp_z))
+        new_origin = bbox_min + interp * (bbox_max - bbox_min)
+        world_offset_base = new_origin - np.array(selected_object.location)
 
-        center_x = min_x + my_interp_x * (max_x - min_x)
-        center_y = min_y + my_interp_y * (max_y - min_y)
-        center_z = min_z + my_interp_z * (max_z - min_z)
+        # 设置同名物体，选中物体放在最前面作为共享网格的基准
+        target_objects = [selected_object]
 
-        new_origin = Vector((center_x, center_y, center_z))
-        world_offset_base = new_origin - selected_object.location
-
-        # 设置同名物体
         global if_sync1
         if if_sync1:
-            name_groups = defaultdict(list)
-            # 遍历所有物体，获取基础名字
-            for obj in bpy.data.objects:
-                base_name = re.split(r'\.\d{3}', obj.name)[0]
-                name_groups[base_name].append(obj)
-
             # 获取具有相同基名的所有物体
-            this_name = re.split(r'\.\d{3}', selected_object.name)[0]
-            same_base_objects = name_groups.get(this_name, [])
-
-            for same_obj in same_base_objects:
-                if same_obj != selected_object:
-                    bpy.context.scene.cursor.location = same_obj.location + world_offset_base
+            same_base_objects = name_index.get_objects(get_base_name(selected_object.name))
 
-                    bpy.ops.object.select_all(action='DESELECT')
-                    bpy.context.view_layer.objects.active = same_obj
-                    same_obj.select_set(True)
+            target_objects.extend(obj for obj in same_base_objects if obj != selected_object)
 
-                    # 设置原点
-                    bpy.ops.object.origin_set(type='ORIGIN_CURSOR', center='MEDIAN')
-
-        # 设置选中物体
-        bpy.context.scene.cursor.location = selected_object.location + world_offset_base
-
-        bpy.ops.object.select_all(action='DESELECT')
-        bpy.context.view_layer.objects.active = selected_object
-        selected_object.select_set(True)
-
-        bpy.ops.object.origin_set(type='ORIGIN_CURSOR', center='MEDIAN')
+        with profile_phase("shift_origins"):
+            mesh_count = shift_origins(target_objects, world_offset_base)
+        profile_count("objects_scanned", len(target_objects))
+        profile_count("meshes_shifted", mesh_count)
 
         return {'FINISHED'}
 
@@ -486,11 +1838,10 @@ class FbxOutput(bpy.types.Operator):
     filepath: bpy.props.StringProperty(subtype="DIR_PATH")
     export_dirpath = None
 
+    @profiled
     def execute(self, context):
-        global tree_root
-
         # 错误检查
-        if not tree_root:
+        if not core.tree_root or core.legal_names is None:
             self.report({'ERROR'}, "未选择 JSON 文件")
             return {'CANCELLED'}
 
@@ -508,81 +1859,86 @@ class FbxOutput(bpy.types.Operator):
             self.report({'ERROR'}, "未选中物体")
             return {'CANCELLED'}
 
-        # 打印合法名称
-        names = []
-        for child in tree_root.children:
-            self.list_all_paths(child, "", names)
-        # self.report({'INFO'}, f"{names}")
+        def report(level, message):
+            self.report({level}, message)
 
-        # 设置全局单位
-        bpy.context.scene.unit_settings.length_unit = 'METERS'
-        bpy.context.scene.unit_settings.scale_length = 0.5
+        props = context.scene.my_tool
+        legal_objects = validate_objects(selected_objects, report)
+        export_dirpath = FbxOutput.export_dirpath
+
+        # 提交到导出队列
+        def on_finish(result):
+            exported_count, skipped_count, failed_count = result
+            export_queue.report('INFO', f"导出 {exported_count} 个，跳过未修改 {skipped_count} 个，失败 {failed_count} 个")
+            export_queue.report('INFO', f"物体成功导出到: {export_dirpath}")
+
+        steps = export_fbx_steps(
+            bpy.context, legal_objects, get_export_prefix(export_dirpath),
+            props.export_mode, props.export_workers, props.force_export, export_queue.report
+        )
+        submit_export(context, "导出 FBX", steps, on_finish)
 
-        # 遍历导出物体
-        for obj in selected_objects:
-            obj_name = obj.name
+        self.report({'INFO'}, f"已加入导出队列: {len(legal_objects)} 个物体")
+        return {'FINISHED'}
 
-            # 是否合法
-            this_name = obj_name.split('.')[0]
-            if (this_name not in names) or (len(obj_name) == 0):
-                self.report({'ERROR'}, f"物体名称非法: {this_name}")
-                continue
+    def invoke(self, context, event):
+        if FbxOutput.export_dirpath:
+            return self.execute(context)
 
-            prefix = FbxOutput.export_dirpath + "Assets\MyTool_Blender\\"
-            export_filepath = prefix + create_path_from_name(obj_name, "Fbx")
-            if not os.path.exists(export_filepath):
-                os.makedirs(export_filepath)
+        self.filepath = ""
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
-            base_name = re.split(r'\.\d{3}', obj_name)[0]
-            export_filepath = os.path.join(export_filepath, f"{base_name}.fbx")
 
-            # 创建副本导出
-            obj_copy = obj.copy()
-            obj_copy.data = obj.data.copy()
-            context.collection.objects.link(obj_copy)
+# 导出 Json
+class JsonCreator(bpy.types.Operator):
+    bl_label = "选择 Unity 项目文件夹"
+    bl_idname = "object.output_json"
 
-            bpy.ops.object.select_all(action='DESELECT')
-            obj_copy.select_set(True)
-            context.view_layer.objects.active = obj_copy
+    filepath: bpy.props.StringProperty(subtype="DIR_PATH")
+    export_dirpath = None
 
-            bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+    @profiled
+    def execute(self, context):
+        # 错误检查
+        if not self.filepath and not JsonCreator.export_dirpath:
+            self.report({'ERROR'}, "No directory selected.")
+            return {'CANCELLED'}
 
-            bpy.ops.export_scene.fbx(
-                filepath=export_filepath,
-                use_selection=True,
-                apply_unit_scale=True,
-                use_space_transform=True,
-                bake_space_transform=True,
-                global_scale=1
-            )
+        # 存储路径
+        if self.filepath:
+            JsonCreator.export_dirpath = self.filepath
 
-            # 删除副本
-            bpy.data.objects.remove(obj_copy, do_unlink=True)
+        # 当前集合的主体合并导出，装饰物写入布局
+        nowcollection = context.collection
+        if not get_main_objects(nowcollection):
+            self.report({'ERROR'}, f"集合中没有主体物体: {nowcollection.name}")
+            return {'CANCELLED'}
 
-        self.report({'INFO'}, f"物体成功导出到: {FbxOutput.export_dirpath}")
-        return {'FINISHED'}
+        props = context.scene.my_tool
+        export_dirpath = JsonCreator.export_dirpath
+        prefix = get_export_prefix(export_dirpath)
 
-    def list_all_paths(self, node, nowname, names):
-        if node is None or node.value == "Bound":
-            return None
+        # 提交到导出队列
+        def on_finish(result):
+            _, item_count, error_count = result
+            profile_count("layout_items", item_count)
 
-        # 过滤中文和下划线
-        pattern = re.compile(r'[^\u4e00-\u9fff_]+')
-        matches = pattern.findall(node.value)
-        result = ''.join(matches)
+            # 生成所有物体的大小 Json 信息，命名配置未变化时不重写
+            with profile_phase("write_size_table"):
+                write_size_table(os.path.join(prefix, "my_size_json.json"), my_size_dict)
 
-        for child in node.children:
-            content = nowname
-            if len(content) != 0:
-                content += '_'
-            content += result
-            self.list_all_paths(child, content, names)
+            if not error_count:
+                export_queue.report('INFO', f"物体成功导出到: {export_dirpath}")
 
-        if len(node.children) == 0 and result != "":
-            names.append(nowname + "_" + result)
+        steps = export_collection_steps(bpy.context, [nowcollection], prefix, 1, props.export_mode, export_queue.report, get_layout_chunking(props))
+        submit_export(context, f"导出集合 {nowcollection.name}", steps, on_finish)
+
+        self.report({'INFO'}, f"已加入导出队列: {nowcollection.name}")
+        return {'FINISHED'}
 
     def invoke(self, context, event):
-        if FbxOutput.export_dirpath:
+        if JsonCreator.export_dirpath:
             return self.execute(context)
 
         self.filepath = ""
@@ -590,99 +1946,50 @@ class FbxOutput(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
 
-# 导出 Json
-class JsonCreator(bpy.types.Operator):
+# 批量导出 Json：所有（或按名字过滤的）集合，FBX 在后台进程中生成，布局在线程池中写入
+class JsonBatchCreator(bpy.types.Operator):
     bl_label = "选择 Unity 项目文件夹"
-    bl_idname = "object.output_json"
+    bl_idname = "object.output_json_batch"
 
     filepath: bpy.props.StringProperty(subtype="DIR_PATH")
-    export_dirpath = None
 
+    @profiled
     def execute(self, context):
         # 错误检查
         if not self.filepath and not JsonCreator.export_dirpath:
             self.report({'ERROR'}, "No directory selected.")
             return {'CANCELLED'}
 
-        # 存储路径
+        # 存储路径，与单个集合导出共用
         if self.filepath:
             JsonCreator.export_dirpath = self.filepath
 
-        # 根据集合名设置路径
-        nowcollection = bpy.context.collection
-        prefix = JsonCreator.export_dirpath + "Assets\MyTool_Blender\\"
-        export_filepath = prefix + nowcollection.name + "\Json"
-        if not os.path.exists(export_filepath):
-            os.makedirs(export_filepath)
-
-        # 根据
-        main_objects = []
-        other_objects = []
-        for obj in nowcollection.objects:
-            if 'Kit' in obj.name or "Adorn" in obj.name:
-                other_objects.append(obj)
-            else:
-                main_objects.append(obj)
-
-        # 合并并导出主体物体
-        bpy.ops.object.select_all(action='DESELECT')
-        object_copies = []
-
-        for obj in main_objects:
-            obj_copy = obj.copy()
-            obj_copy.data = obj_copy.data.copy()
-            bpy.context.collection.objects.link(obj_copy)
-            object_copies.append(obj_copy)
-
-        for obj_copy in object_copies:
-            obj_copy.select_set(True)
-
-        bpy.context.view_layer.objects.active = object_copies[-1]
+        start_time = time.perf_counter()
+        props = context.scene.my_tool
+        prefix = get_export_prefix(JsonCreator.export_dirpath)
+        collection_filter = props.batch_filter or "*"
 
-        bpy.ops.object.join()
-        merged_object = bpy.context.view_layer.objects.active
+        collections = [collection for collection in bpy.data.collections if fnmatch.fnmatchcase(collection.name, collection_filter)]
+        if not collections:
+            self.report({'WARNING'}, f"没有匹配的集合: {collection_filter}")
+            return {'CANCELLED'}
 
-        base_export_filepath = os.path.join(export_filepath, f"{nowcollection.name}.fbx")
+        # 提交到导出队列
+        def on_finish(result):
+            collection_count, item_count, error_count = result
+            if not collection_count:
+                export_queue.report('WARNING', f"没有包含主体物体的集合: {collection_filter}")
+                return
 
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+            # 大小信息只写一次
+            write_size_table(os.path.join(prefix, "my_size_json.json"), my_size_dict)
 
-        bpy.ops.export_scene.fbx(
-            filepath=base_export_filepath,
-            use_selection=True,
-            apply_unit_scale=True,
-            use_space_transform=True,
-            bake_space_transform=True,
-            global_scale=1
-        )
+            export_queue.report('INFO', f"集合 {collection_count} 个，装饰物 {item_count} 个，失败 {error_count} 项，用时 {time.perf_counter() - start_time:.1f} 秒")
 
-        main_location = merged_object.location
-        bpy.data.objects.remove(merged_object, do_unlink=True)
+        steps = export_collection_steps(bpy.context, collections, prefix, props.export_workers, props.export_mode, export_queue.report, get_layout_chunking(props))
+        submit_export(context, "批量导出集合", steps, on_finish)
 
-        # 生成集合内部物体的基础 Json 信息
-        base_export_filepath = os.path.join(export_filepath, f"{nowcollection.name}.json")
-        my_scale = bpy.context.scene.unit_settings.scale_length
-        base_structures = {"items": []}
-        for obj in other_objects:
-            structure = {"name": f"{obj.name}", "data": []}
-            structure["data"].append({"location": f"{(obj.location - main_location) * my_scale}"})
-            structure["data"].append({"euler": f"{obj.rotation_euler}"})
-            structure["data"].append({"scale": f"{obj.scale}"})
-            base_structures["items"].append(structure)
-
-        with open(base_export_filepath, 'w', encoding='utf-8') as json_file:
-            json.dump(base_structures, json_file, ensure_ascii=False, indent=2)
-
-        # 生成所有物体的大小 Json 信息
-        size_export_filepath = os.path.join(prefix, "my_size_json.json")
-        size_structures = {"items": []}
-        for key, value in my_size_dict.items():
-            structure = {"name": f"{key}", "size": value}
-            size_structures["items"].append(structure)
-
-        with open(size_export_filepath, 'w', encoding='utf-8') as json_file:
-            json.dump(size_structures, json_file, ensure_ascii=False, indent=2)
-
-        self.report({'INFO'}, f"物体成功导出到: {JsonCreator.export_dirpath}")
+        self.report({'INFO'}, f"已加入导出队列: {len(collections)} 个集合")
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -694,6 +2001,28 @@ class JsonCreator(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
 
+# 面板中的分块设置
+def get_layout_chunking(props):
+    if props.layout_chunking == 'NONE':
+        return None
+    return {"mode": props.layout_chunking, "cell_size": props.layout_chunk_size, "capacity": props.layout_chunk_capacity}
+
+
+# 取消导出队列中的所有任务，已导出的文件保留，正在写入的临时文件会被删除
+class ExportCanceller(bpy.types.Operator):
+    bl_label = "取消导出"
+    bl_idname = "object.cancel_export"
+
+    def execute(self, context):
+        if not export_queue.busy:
+            self.report({'WARNING'}, "没有正在运行的导出")
+            return {'CANCELLED'}
+
+        export_queue.cancel()
+        redraw_export_progress()
+        return {'FINISHED'}
+
+
 # ======================================================================================================================
 # 根据解析的 JSON 数据命名
 class PanelName(bpy.types.Panel):
@@ -711,14 +2040,31 @@ class PanelName(bpy.types.Panel):
         layout = self.layout
         box = layout.box()
 
+        # 恢复上次使用的配置
+        restore_naming_config(context.scene)
+
         # 导入 JSON 文件
         row = box.row()
         row.operator("object.load_json", text="导入 JSON 文件")
+        if tool.config_filepath:
+            row = box.row()
+            row.label(text=os.path.basename(tool.config_filepath) if core.tree_root else f"未加载: {os.path.basename(tool.config_filepath)}")
 
         # 同步功能 0
         row = box.row()
         row.prop(tool, "func0", text="同步所有同名物体")
 
+        # 搜索名称
+        row = box.row()
+        row.prop(tool, "name_search", text="", icon='VIEWZOOM')
+        if tool.name_search:
+            results = get_name_search_results(tool)
+            column = box.column(align=True)
+            for i, (name, path) in enumerate(results[:NAME_SEARCH_LINES]):
+                column.operator("object.pick_name", text=name).index = i
+            if not results:
+                column.label(text="没有匹配的名称")
+
         # 动态 UI 界面
         for i in range(6):
             prop = f"prefix_{i}"
@@ -734,11 +2080,16 @@ class PanelName(bpy.types.Panel):
         # 设置命名
         row = box.row()
         row.operator("object.set_name", text="命名")
+        row.operator("object.set_name", text="预览").dry_run = True
 
         # 创建集合
         row = box.row()
         row.operator("object.create_collection", text="创建集合")
 
+        # 命名统计
+        row = box.row()
+        row.operator("object.name_index_stats", text="命名统计")
+
         # 分隔线
         layout.separator()
 
@@ -792,14 +2143,185 @@ class PanelOutput(bpy.types.Panel):
         layout = self.layout
         box = layout.box()
 
+        # 导出队列进度，旧版本没有进度条时显示文字
+        if export_queue.busy:
+            stage, done, total = export_queue.progress
+            text = f"{stage} {done}/{total}" if total else stage
+            if len(export_queue) > 1:
+                text += f"（排队 {len(export_queue) - 1} 个）"
+
+            row = box.row()
+            if hasattr(row, "progress"):
+                row.progress(factor=done / total if total else 0.0, text=text)
+            else:
+                row.label(text=text, icon='TIME')
+            row.operator("object.cancel_export", text="", icon='CANCEL')
+
+        # 最近的导出信息，完整内容在控制台
+        messages = list(export_queue.messages)[-EXPORT_MESSAGE_LINES:]
+        if export_queue.error_count:
+            row = box.row()
+            row.label(text=f"失败 {export_queue.error_count} 项，详见控制台", icon='CANCEL')
+        for level, message in messages:
+            row = box.row()
+            row.label(text=message, icon=EXPORT_MESSAGE_ICONS.get(level, 'INFO'))
+
+        # 导出检查
+        row = box.row()
+        row.operator("object.lint_export", text="检查导出")
+        if lint_summary:
+            row = box.row()
+            row.label(text=lint_summary)
+
         # 导出 JSON
         row = box.row()
         row.operator("object.output_json", text="创建 JSON")
 
+        # 批量导出 JSON
+        row = box.row()
+        row.prop(context.scene.my_tool, "batch_filter")
+        row.operator("object.output_json_batch", text="批量创建 JSON")
+
+        # 布局分块
+        row = box.row()
+        row.prop(context.scene.my_tool, "layout_chunking")
+        if context.scene.my_tool.layout_chunking == 'GRID':
+            row.prop(context.scene.my_tool, "layout_chunk_size")
+        elif context.scene.my_tool.layout_chunking == 'OCTREE':
+            row.prop(context.scene.my_tool, "layout_chunk_capacity")
+
         # 导出物体
         row = box.row()
         row.operator("object.output_fbx", text="导出为 FBX")
 
+        # 忽略导出缓存
+        row = box.row()
+        row.prop(context.scene.my_tool, "force_export", text="强制全部重新导出")
+
+        # 导出方式
+        row = box.row()
+        row.prop(context.scene.my_tool, "export_mode")
+
+        # 并行导出
+        row = box.row()
+        row.prop(context.scene.my_tool, "export_workers")
+
+        # 性能记录
+        row = box.row()
+        row.prop(context.scene.my_tool, "profile_enabled", text="记录性能")
+        if context.scene.my_tool.profile_enabled:
+            row = box.row()
+            row.prop(context.scene.my_tool, "profile_dirpath")
+
+
+# ======================================================================================================================
+# 命令行：blender -b scene.blend --python MyTool_Blender.py -- <命令> [参数]
+CLI_COMMANDS = ("validate", "lint", "export-fbx", "export-layout")
+
+
+def cli_report(level, message):
+    print(f"[MyTool] {level}: {message}", flush=True)
+
+
+def build_cli_parser():
+    parser = argparse.ArgumentParser(prog="MyTool_Blender.py", description="MyTool 命令行导出")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("--trace", help="写入性能记录（Chrome trace JSON）")
+
+    validate_parser = subparsers.add_parser("validate", parents=[common_parser], help="检查网格物体名称")
+    validate_parser.add_argument("--config", required=True, help="命名配置表 JSON 文件")
+    validate_parser.add_argument("--objects", default="*", help="物体名过滤，支持通配符")
+
+    lint_parser = subparsers.add_parser("lint", parents=[common_parser], help="检查文件中所有网格物体的名称、分类和变换")
+    lint_parser.add_argument("--config", required=True, help="命名配置表 JSON 文件")
+
+    fbx_parser = subparsers.add_parser("export-fbx", parents=[common_parser], help="导出网格物体为 FBX")
+    fbx_parser.add_argument("--config", required=True, help="命名配置表 JSON 文件")
+    fbx_parser.add_argument("--output", required=True, help="Unity 项目文件夹")
+    fbx_parser.add_argument("--objects", default="*", help="物体名过滤，支持通配符")
+    fbx_parser.add_argument("--mode", choices=sorted(FBX_EXPORTERS), default='COPY', help="导出方式")
+    fbx_parser.add_argument("--workers", type=int, default=1, help="并行导出进程数")
+    fbx_parser.add_argument("--force", action="store_true", help="忽略导出缓存")
+
+    layout_parser = subparsers.add_parser("export-layout", parents=[common_parser], help="导出集合主体 FBX 和布局 Json")
+    layout_parser.add_argument("--config", help="命名配置表 JSON 文件，指定时同时写入大小信息")
+    layout_parser.add_argument("--output", required=True, help="Unity 项目文件夹")
+    layout_parser.add_argument("--collections", default="*", help="集合名过滤，支持通配符")
+    layout_parser.add_argument("--workers", type=int, default=1, help="并行导出进程数")
+    layout_parser.add_argument("--chunks", choices=[mode.lower() for mode in LAYOUT_CHUNK_MODES], help="另外写入分块布局")
+    layout_parser.add_argument("--chunk-size", type=float, default=50.0, help="网格边长")
+    layout_parser.add_argument("--chunk-capacity", type=int, default=1024, help="八叉树每块的最多装饰物数量")
+
+    return parser
+
+
+def get_cli_objects(pattern):
+    return [obj for obj in bpy.context.scene.objects if obj.type == 'MESH' and fnmatch.fnmatchcase(obj.name, pattern)]
+
+
+# 执行命令，返回退出码：0 成功，1 有名称非法或导出失败
+def run_cli(argv):
+    args = build_cli_parser().parse_args(argv)
+    if not args.trace:
+        return run_cli_command(args)
+
+    profiler = start_profiling(args.command)
+    try:
+        with profile_phase(args.command):
+            return run_cli_command(args)
+    finally:
+        stop_profiling()
+        for line in profiler.summary():
+            cli_report('INFO', line)
+        ensure_parent_dir(os.path.abspath(args.trace))
+        profiler.write_trace(args.trace)
+
+
+def run_cli_command(args):
+    context = bpy.context
+
+    if args.config:
+        load_naming_config(args.config, get_config_cache_dirpath())
+
+    if args.command == "validate":
+        objects = get_cli_objects(args.objects)
+        legal_objects = validate_objects(objects, cli_report)
+        cli_report('INFO', f"检查 {len(objects)} 个，非法 {len(objects) - len(legal_objects)} 个")
+        return 0 if len(legal_objects) == len(objects) else 1
+
+    if args.command == "lint":
+        result = run_export_lint()
+        error_count, warning_count = report_lint(result, cli_report)
+        cli_report('INFO', f"网格物体 {result['objects']} 个，错误 {error_count} 项，警告 {warning_count} 项")
+        return 0 if not error_count else 1
+
+    if args.command == "export-fbx":
+        objects = get_cli_objects(args.objects)
+        legal_objects = validate_objects(objects, cli_report)
+        exported_count, skipped_count, failed_count = run_steps(export_fbx_steps(
+            context, legal_objects, get_export_prefix(args.output), args.mode, max(1, args.workers), args.force, cli_report
+        ))
+        cli_report('INFO', f"导出 {exported_count} 个，跳过未修改 {skipped_count} 个，失败 {failed_count} 个，名称非法 {len(objects) - len(legal_objects)} 个")
+        return 0 if not failed_count and len(legal_objects) == len(objects) else 1
+
+    prefix = get_export_prefix(args.output)
+    collections = [collection for collection in bpy.data.collections if fnmatch.fnmatchcase(collection.name, args.collections)]
+    chunking = None
+    if args.chunks:
+        chunking = {"mode": args.chunks.upper(), "cell_size": args.chunk_size, "capacity": max(1, args.chunk_capacity)}
+    collection_count, item_count, error_count = run_steps(export_collection_steps(context, collections, prefix, max(1, args.workers), 'COPY', cli_report, chunking))
+    if args.config:
+        write_size_table(os.path.join(prefix, "my_size_json.json"), my_size_dict)
+
+    if not collection_count:
+        cli_report('WARNING', f"没有匹配的集合: {args.collections}")
+        return 1
+
+    cli_report('INFO', f"集合 {collection_count} 个，装饰物 {item_count} 个，失败 {error_count} 项")
+    return 0 if not error_count else 1
+
 
 # ======================================================================================================================
 def register():
@@ -814,12 +2336,23 @@ def register():
     # =======================================
     bpy.utils.register_class(JsonLoader)
     bpy.utils.register_class(NameSetter)
+    bpy.utils.register_class(NameIndexStats)
+    bpy.utils.register_class(NamePicker)
+    bpy.utils.register_class(ExportLinter)
     bpy.utils.register_class(CollectionCreator)
 
     bpy.utils.register_class(CenterSetter)
 
     bpy.utils.register_class(JsonCreator)
+    bpy.utils.register_class(JsonBatchCreator)
     bpy.utils.register_class(FbxOutput)
+    bpy.utils.register_class(ExportCanceller)
+
+    # =======================================
+    for handlers, handler in APP_HANDLERS:
+        handlers.append(handler)
+    name_index.mark_dirty()
+    export_lint.mark_dirty()
 
 
 def unregister():
@@ -834,13 +2367,34 @@ def unregister():
     # =======================================
     bpy.utils.unregister_class(JsonLoader)
     bpy.utils.unregister_class(NameSetter)
+    bpy.utils.unregister_class(NameIndexStats)
+    bpy.utils.unregister_class(NamePicker)
+    bpy.utils.unregister_class(ExportLinter)
     bpy.utils.unregister_class(CollectionCreator)
 
     bpy.utils.unregister_class(CenterSetter)
 
     bpy.utils.unregister_class(JsonCreator)
+    bpy.utils.unregister_class(JsonBatchCreator)
     bpy.utils.unregister_class(FbxOutput)
+    bpy.utils.unregister_class(ExportCanceller)
+
+    # =======================================
+    for handlers, handler in APP_HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    name_index.mark_dirty()
+
+    export_queue.cancel()
+    if bpy.app.timers.is_registered(drain_export_queue):
+        bpy.app.timers.unregister(drain_export_queue)
 
 
 if __name__ == "__main__":
-    register()
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if argv and argv[0] == "fbx-worker":
+        run_fbx_worker(argv[1], argv[2])
+    elif argv and argv[0] in CLI_COMMANDS:
+        sys.exit(run_cli(argv))
+    else:
+        register()
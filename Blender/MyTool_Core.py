@@ -0,0 +1,1980 @@
+﻿import io
+import os
+import re
+import sys
+import math
+import time
+import heapq
+import uuid
+import pickle
+import hashlib
+import json
+from collections import deque
+from array import array
+from contextlib import contextmanager
+
+# 不依赖 bpy 的核心逻辑：命名树、合法名称、重命名计划、导出路径、布局格式
+# 插件和命令行共用，也可以在普通 Python 中导入
+
+# =================================================
+tree_path = []
+tree_root = None
+legal_names = None
+name_search = None
+profiler = None
+
+
+# ======================================================================================================================
+# 性能分析：默认关闭，打开后记录各阶段耗时和计数，输出 Chrome trace（chrome://tracing 或 Perfetto 打开）
+class Profiler:
+    def __init__(self, name):
+        self.name = name
+        self.start_time = time.perf_counter()
+        self.events = []
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append((name, start - self.start_time, time.perf_counter() - start))
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    # 各阶段的总耗时（按耗时排序）和全部计数
+    def summary(self, top=8):
+        totals = {}
+        for name, _, duration in self.events:
+            totals[name] = totals.get(name, 0.0) + duration
+
+        lines = [f"{name}: {duration * 1000:.1f} ms" for name, duration in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]]
+        lines.extend(f"{name}: {value}" for name, value in sorted(self.counters.items()))
+        return lines
+
+    def dump_trace(self):
+        trace_events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": f"MyTool {self.name}"}}]
+        end_time = 0.0
+        for name, start, duration in sorted(self.events, key=lambda event: (event[1], -event[2])):
+            trace_events.append({"name": name, "cat": self.name, "ph": "X", "ts": round(start * 1e6, 3), "dur": round(duration * 1e6, 3), "pid": 1, "tid": 1})
+            end_time = max(end_time, start + duration)
+
+        if self.counters:
+            trace_events.append({"name": "counters", "ph": "C", "ts": round(end_time * 1e6, 3), "pid": 1, "tid": 1, "args": dict(self.counters)})
+        return json.dumps({"traceEvents": trace_events, "displayTimeUnit": "ms"}, ensure_ascii=False)
+
+    def write_trace(self, filepath):
+        write_file_atomic(filepath, self.dump_trace())
+
+
+def start_profiling(name):
+    global profiler
+
+    profiler = Profiler(name)
+    return profiler
+
+
+def stop_profiling():
+    global profiler
+
+    stopped, profiler = profiler, None
+    return stopped
+
+
+# 未开启分析时什么也不做
+@contextmanager
+def profile_phase(name):
+    if profiler is None:
+        yield
+        return
+
+    with profiler.phase(name):
+        yield
+
+
+# 分步任务中的阶段：每一步单独计时，两次时间片之间的空闲和界面操作不计入
+# 外层关闭时同时关闭内层生成器，保证其中的清理代码执行
+def profile_steps(name, steps):
+    try:
+        while True:
+            with profile_phase(name):
+                try:
+                    step = next(steps)
+                except StopIteration as e:
+                    return e.value
+            yield step
+    finally:
+        steps.close()
+
+
+def profile_count(name, value=1):
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+# ======================================================================================================================
+# 虚拟层级：所有 Bound 共享同一份取值和下拉菜单
+class VirtualLevel:
+    def __init__(self, values, next_level=None):
+        self.values = values
+        self.value_set = frozenset(values)
+        self.enum_items = tuple((value, value, "") for value in values)
+        self.next_level = next_level
+
+
+BOUND_NUMBERS = VirtualLevel(tuple(str(i).zfill(2) for i in range(10)))
+BOUND_LETTERS = VirtualLevel(tuple(chr(i) for i in range(ord('A'), ord('Z') + 1)), BOUND_NUMBERS)
+
+# 存储中的虚拟层级编号
+VIRTUAL_LEVELS = (None, BOUND_LETTERS, BOUND_NUMBERS)
+
+
+# 树形结构：节点存放在平行数组中，同一父节点的子节点连续存放，标签字符串只存一份
+# Bound 展开的字母 / 数字节点不占存储，每种虚拟层级只生成一份共享的节点视图
+# 值 -> 子节点 的索引、下拉菜单元组和节点视图在第一次访问某个节点时生成并缓存
+class TreeStore:
+    def __init__(self):
+        self.labels = []
+        self.label_ids = {}
+
+        self.label = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.child_count = array('i')
+        self.virtual = bytearray()
+        # 虚拟子节点插在第几个真实子节点之前
+        self.virtual_index = array('i')
+
+        # 访问过的节点：节点下标 -> {值: 子节点下标}，节点下标 -> 下拉菜单元组，节点下标 -> 节点视图
+        self.children = {}
+        self.enum_items = {}
+        self.views = {}
+        # 虚拟层级 -> {值: 节点视图}
+        self.virtual_views = {}
+
+    def __len__(self):
+        return len(self.label)
+
+    def intern(self, value):
+        label_id = self.label_ids.get(value)
+        if label_id is None:
+            label_id = len(self.labels)
+            self.labels.append(value)
+            self.label_ids[value] = label_id
+        return label_id
+
+    def add_node(self, value, parent):
+        index = len(self.label)
+        self.label.append(self.intern(value))
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.virtual.append(0)
+        self.virtual_index.append(0)
+        return index
+
+    # 一次添加某个节点的全部子节点，返回第一个子节点的下标
+    def add_children(self, parent, values):
+        first = len(self.label)
+        for value in values:
+            self.add_node(value, parent)
+        self.first_child[parent] = first
+        self.child_count[parent] = len(values)
+        return first
+
+    def set_virtual(self, index, virtual, virtual_index):
+        self.virtual[index] = VIRTUAL_LEVELS.index(virtual)
+        self.virtual_index[index] = virtual_index
+
+    # 建树或从缓存恢复后调用一次，清空按需生成的缓存
+    def reset_cache(self):
+        self.children = {}
+        self.enum_items = {}
+        self.views = {}
+        self.virtual_views = {
+            virtual: {value: TreeNode(self, -1, value, virtual.next_level) for value in virtual.values}
+            for virtual in VIRTUAL_LEVELS if virtual
+        }
+
+    # 同名子节点取第一个，值与标签表共用字符串
+    def get_children(self, index):
+        children = self.children.get(index)
+        if children is None:
+            labels = self.labels
+            label = self.label
+            first = self.first_child[index]
+            children = {}
+            for i in range(first, first + self.child_count[index]):
+                children.setdefault(labels[label[i]], i)
+            self.children[index] = children
+        return children
+
+    def get_enum_items(self, index):
+        enum_items = self.enum_items.get(index)
+        if enum_items is None:
+            first = self.first_child[index]
+            values = [self.labels[label_id] for label_id in self.label[first:first + self.child_count[index]]]
+            virtual = VIRTUAL_LEVELS[self.virtual[index]]
+            if virtual:
+                position = self.virtual_index[index]
+                values[position:position] = virtual.values
+            enum_items = tuple((value, value, "") for value in values)
+            self.enum_items[index] = enum_items
+        return enum_items
+
+    def node(self, index):
+        view = self.views.get(index)
+        if view is None:
+            view = TreeNode(self, index, self.labels[self.label[index]], VIRTUAL_LEVELS[self.virtual[index]])
+            self.views[index] = view
+        return view
+
+    # 实际占用的内存：数组、标签表，以及已经生成的索引、下拉菜单元组和节点视图（共用的字符串只算一次）
+    def nbytes(self):
+        arrays = (self.label, self.parent, self.first_child, self.child_count, self.virtual_index, self.virtual)
+        size = sum(sys.getsizeof(values) for values in arrays)
+        size += sys.getsizeof(self.labels) + sum(sys.getsizeof(value) for value in self.labels) + sys.getsizeof(self.label_ids)
+        size += sys.getsizeof(self.children) + sum(sys.getsizeof(children) for children in self.children.values())
+        size += sys.getsizeof(self.enum_items)
+        for enum_items in self.enum_items.values():
+            size += sys.getsizeof(enum_items) + sum(sys.getsizeof(item) for item in enum_items)
+        size += sys.getsizeof(self.views)
+        for view in self.views.values():
+            size += sys.getsizeof(view) + sys.getsizeof(view.child_views)
+        return size
+
+    # 用于缓存的状态：标签表和各数组的字节
+    def dump_state(self):
+        arrays = (self.label, self.parent, self.first_child, self.child_count, self.virtual_index)
+        return self.labels, [values.tobytes() for values in arrays], bytes(self.virtual)
+
+    @classmethod
+    def load_state(cls, state):
+        labels, buffers, virtual = state
+        store = cls()
+        store.labels = list(labels)
+        store.label_ids = {value: i for i, value in enumerate(store.labels)}
+        for values, buffer in zip((store.label, store.parent, store.first_child, store.child_count, store.virtual_index), buffers):
+            values.frombytes(buffer)
+        store.virtual = bytearray(virtual)
+        store.reset_cache()
+        return store
+
+
+# 节点视图：(存储, 下标)，虚拟节点的下标为 -1
+# 视图由存储缓存，下拉菜单元组在第一次使用时取出，查过的子节点视图记在 child_views 中
+class TreeNode:
+    __slots__ = ("store", "index", "value", "virtual", "enum_items", "child_views")
+
+    def __init__(self, store, index, value, virtual=None):
+        self.store = store
+        self.index = index
+        self.value = value
+        self.virtual = virtual
+        self.enum_items = None
+        self.child_views = {}
+
+    @property
+    def real_children(self):
+        if self.index < 0:
+            return []
+        store = self.store
+        first = store.first_child[self.index]
+        return [store.node(i) for i in range(first, first + store.child_count[self.index])]
+
+    @property
+    def virtual_index(self):
+        return self.store.virtual_index[self.index] if self.index >= 0 else 0
+
+    @property
+    def children(self):
+        children = self.real_children
+        if self.virtual:
+            position = self.virtual_index
+            children[position:position] = self.store.virtual_views[self.virtual].values()
+        return children
+
+    # 下拉菜单每次重绘都会逐层调用，先查视图自己的缓存
+    def get_child(self, value):
+        child = self.child_views.get(value)
+        if child is not None:
+            return child
+
+        store = self.store
+        index = store.get_children(self.index).get(value) if self.index >= 0 else None
+        if index is not None:
+            child = store.node(index)
+        elif self.virtual:
+            child = store.virtual_views[self.virtual].get(value)
+        if child is not None:
+            self.child_views[value] = child
+        return child
+
+    def get_enum_items(self):
+        enum_items = self.enum_items
+        if enum_items is None:
+            if self.index >= 0:
+                enum_items = self.store.get_enum_items(self.index)
+            else:
+                enum_items = self.virtual.enum_items if self.virtual else ()
+            self.enum_items = enum_items
+        return enum_items
+
+
+# 大小规则：前缀 + 任意字母 + "_" + 两位数字 -> 大小
+SIZE_FORMAT = "MyToolSize"
+SIZE_VERSION = 2
+
+
+class SizeRules:
+    def __init__(self):
+        self.rules = {}
+
+    def add_rule(self, prefix, size):
+        self.rules[prefix] = size
+
+    def clear(self):
+        self.rules.clear()
+
+    def get(self, name, default=None):
+        if len(name) < 4 or name[-3] != '_':
+            return default
+
+        letter, number = name[-4], name[-2:]
+        if letter not in BOUND_LETTERS.value_set or number not in BOUND_NUMBERS.value_set:
+            return default
+        return self.rules.get(name[:-4], default)
+
+    def __getitem__(self, name):
+        size = self.get(name)
+        if size is None:
+            raise KeyError(name)
+        return size
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.rules) * len(BOUND_LETTERS.values) * len(BOUND_NUMBERS.values)
+
+    # 生成紧凑的规则文件内容和内容哈希，规则按前缀排序保证哈希稳定
+    def dump(self):
+        rules = [{"prefix": prefix, "size": size} for prefix, size in sorted(self.rules.items())]
+        content_hash = hashlib.sha1(json.dumps(rules, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()
+        size_structures = {"format": SIZE_FORMAT, "version": SIZE_VERSION, "hash": content_hash, "rules": rules}
+        return json.dumps(size_structures, ensure_ascii=False, separators=(',', ':')), content_hash
+
+    # 展开为完整的 名称 -> 大小 条目
+    def items(self):
+        for prefix, size in self.rules.items():
+            for value0 in BOUND_LETTERS.values:
+                for value1 in BOUND_NUMBERS.values:
+                    yield prefix + value0 + "_" + value1, size
+
+
+my_size_dict = SizeRules()
+
+
+# 写入大小规则文件，内容哈希与磁盘上相同时不写，返回是否写入
+size_table_hashes = {}
+
+
+def write_size_table(filepath, size_rules):
+    text, content_hash = size_rules.dump()
+    if size_table_hashes.get(filepath) == content_hash and os.path.exists(filepath):
+        return False
+
+    if os.path.exists(filepath):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                if json.load(f).get("hash") == content_hash:
+                    size_table_hashes[filepath] = content_hash
+                    return False
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    write_file_atomic(filepath, text)
+    size_table_hashes[filepath] = content_hash
+    return True
+
+
+# ======================================================================================================================
+# 检查 JSON 文件格式
+def parse_json_to_tree(json_data):
+    if not isinstance(json_data, list) or not json_data:
+        raise ValueError("JSON 数据为空或无法读取")
+
+    naming_config = json_data[0].get("title", {})
+    if naming_config != "命名配置表":
+        raise ValueError(f"Json 文件的第一个 title 应该是 '命名配置表',但获取到的是 '{naming_config}'")
+
+    store = TreeStore()
+    root = store.add_node(naming_config, -1)
+    topics = json_data[0].get("topics", [])
+
+    my_size_dict.clear()
+    build_base_tree(store, root, topics, "")
+
+    if not len(store):
+        raise ValueError(f"构建树失败，请检查错误")
+    store.reset_cache()
+    return store.node(root)
+
+
+# 构建树并存储大小规则，逐层添加，保证同一父节点的子节点连续
+def build_base_tree(store, parent, topics, nowname):
+    queue = deque([(parent, topics, nowname)])
+    while queue:
+        parent, topics, nowname = queue.popleft()
+
+        real_topics = []
+        for topic in topics:
+            if topic["title"] != "Bound":
+                real_topics.append(topic)
+            else:
+                store.set_virtual(parent, BOUND_LETTERS, len(real_topics))
+                my_size_dict.add_rule(nowname, topic["topics"][0].get("title", {}))
+
+        first = store.add_children(parent, [topic["title"] for topic in real_topics])
+        for i, topic in enumerate(real_topics):
+            if "topics" in topic and topic["topics"]:
+                thisname = re.sub(r'[^a-zA-Z0-9]', '', topic["title"]) + "_"
+                profile_count("regex_calls")
+                queue.append((first + i, topic["topics"], nowname + thisname))
+
+
+# 输出树的所有路径 DFS
+def dfs(node, current_path):
+    if not node:
+        return
+    current_path.append(node.value)
+    if not node.children:
+        tree_path.append(list(current_path))
+    else:
+        for child in node.children:
+            dfs(child, current_path)
+    current_path.pop()
+
+
+# ======================================================================================================================
+# 合法名称：哈希集合 + 按 "_" 分段的前缀树
+CHINESE_PATTERN = re.compile(r'[^\u4e00-\u9fff_]+')
+TRIE_END = None
+TRIE_BOUND = "<Bound>"
+
+
+class LegalNames:
+    def __init__(self):
+        self.names = set()
+        self.bound_prefixes = set()
+        self.trie = {}
+
+    def insert_trie(self, name, key):
+        node = self.trie
+        for part in name.split('_'):
+            node = node.setdefault(part, {})
+        node[key] = True
+
+    def add_name(self, name):
+        self.names.add(name)
+        self.insert_trie(name, TRIE_END)
+
+    # Bound 名称：前缀 + "_" + 字母 + "_" + 两位数字
+    def add_bound(self, prefix):
+        self.bound_prefixes.add(prefix)
+        self.insert_trie(prefix, TRIE_BOUND)
+
+    def __contains__(self, name):
+        if name in self.names:
+            return True
+        if len(name) < 6 or name[-3] != '_' or name[-5] != '_':
+            return False
+        if name[-4] not in BOUND_LETTERS.value_set or name[-2:] not in BOUND_NUMBERS.value_set:
+            return False
+        return name[:-5] in self.bound_prefixes
+
+    def __len__(self):
+        return len(self.names) + len(self.bound_prefixes) * len(BOUND_LETTERS.values) * len(BOUND_NUMBERS.values)
+
+    # 最接近的合法前缀，用于提示名称错误的位置
+    def closest_prefix(self, name):
+        parts = name.split('_')
+        node = self.trie
+        matched = []
+        for i, part in enumerate(parts):
+            if TRIE_BOUND in node:
+                if part in BOUND_LETTERS.value_set:
+                    matched.append(part)
+                    if i + 1 < len(parts) and parts[i + 1] in BOUND_NUMBERS.value_set:
+                        matched.append(parts[i + 1])
+                break
+            if part not in node:
+                break
+            matched.append(part)
+            node = node[part]
+        return '_'.join(matched)
+
+
+# 遍历树生成所有合法名称，不展开虚拟节点
+def build_legal_names(root):
+    names = LegalNames()
+    if not root:
+        return names
+
+    # 父节点总在子节点之前，按存储顺序遍历一次即可；每个标签只做一次正则
+    store = root.store
+    results = [''.join(CHINESE_PATTERN.findall(label)) for label in store.labels]
+    contents = [""] * len(store)
+    for i in range(root.index + 1, len(store)):
+        nowname = contents[store.parent[i]]
+        result = results[store.label[i]]
+
+        content = nowname
+        if len(content) != 0:
+            content += '_'
+        content += result
+        contents[i] = content
+
+        virtual = VIRTUAL_LEVELS[store.virtual[i]]
+        if virtual is BOUND_LETTERS:
+            names.add_bound(content)
+
+        if not store.child_count[i] and not virtual and result != "":
+            names.add_name(nowname + "_" + result)
+
+    profile_count("regex_calls", len(store.labels))
+    return names
+
+
+# 检查物体名称（去掉 .001 后缀）是否合法，返回 (合法名字列表, [(名字, 最接近的合法前缀)])
+def check_names(names, legal_names):
+    legal = []
+    illegal = []
+    for name in names:
+        this_name = name.split('.')[0]
+        if len(name) == 0 or this_name not in legal_names:
+            illegal.append((this_name, legal_names.closest_prefix(this_name)))
+            continue
+        legal.append(name)
+    profile_count("names_checked", len(names))
+    return legal, illegal
+
+
+# ======================================================================================================================
+# 名称搜索：所有叶子路径（以及 Bound 前缀）作为条目，条目是标签路径
+# 标签在树中共享，词表很小：前缀树和三元组索引建在词表上，词 -> 标签 -> 条目
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]+')
+# 查询末尾的 Bound 字母和数字，例如 "lamp b 03" / "lamp_B_03"
+SEARCH_BOUND_PATTERN = re.compile(r'(?:^|[\s_])([a-z])[\s_]?(\d{2})$')
+SEARCH_LIMIT = 20
+SEARCH_FUZZY_RATIO = 0.4
+
+
+def get_trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def split_search_tokens(text):
+    return SEARCH_TOKEN_PATTERN.findall(text.lower())
+
+
+class NameSearchIndex:
+    def __init__(self):
+        # 条目：名称（与下拉菜单拼出的名称一致）、标签路径（path_start[i]:path_start[i + 1]）、是否为 Bound 前缀
+        self.names = []
+        self.path_start = array('i', [0])
+        self.path_labels = array('i')
+        self.bound = bytearray()
+
+        # 标签：编号与 TreeStore 相同，每个标签记录路径中含有它的条目
+        self.labels = []
+        self.label_postings = []
+
+        # 词表：词 -> 编号，编号 -> 含有它的标签
+        self.tokens = []
+        self.token_ids = {}
+        self.token_labels = []
+        self.trie = {}
+        self.trigrams = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_token(self, token, label_id):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.tokens.append(token)
+            self.token_ids[token] = token_id
+            self.token_labels.append([])
+
+            node = self.trie
+            for char in token:
+                node = node.setdefault(char, {})
+            node[TRIE_END] = token_id
+
+            for trigram in get_trigrams(token):
+                self.trigrams.setdefault(trigram, []).append(token_id)
+
+        if label_id not in self.token_labels[token_id]:
+            self.token_labels[token_id].append(label_id)
+
+    def set_labels(self, labels):
+        self.labels = list(labels)
+        self.label_postings = [array('i') for _ in self.labels]
+        for label_id, label in enumerate(self.labels):
+            for token in split_search_tokens(label):
+                self.add_token(token, label_id)
+            # 下拉菜单拼名字时去掉符号，"Lamp-01" 也能用 "lamp01" 搜到
+            joined = re.sub(r'[^a-zA-Z0-9]', '', label).lower()
+            if joined:
+                self.add_token(joined, label_id)
+
+    def add_entry(self, name, path, bound):
+        entry = len(self.names)
+        self.names.append(name)
+        self.path_labels.extend(path)
+        self.path_start.append(len(self.path_labels))
+        self.bound.append(1 if bound else 0)
+        for label_id in path:
+            postings = self.label_postings[label_id]
+            if not postings or postings[-1] != entry:
+                postings.append(entry)
+
+    def get_path(self, entry):
+        return tuple(self.labels[label_id] for label_id in self.path_labels[self.path_start[entry]:self.path_start[entry + 1]])
+
+    # 以 prefix 开头的所有词
+    def prefix_tokens(self, prefix):
+        node = self.trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+
+        token_ids = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is TRIE_END:
+                    token_ids.append(child)
+                else:
+                    stack.append(child)
+        return token_ids
+
+    # 查询词与词表的匹配分数：完全相同 4，前缀 3，包含 2
+    # 都没有时按三元组重合度找相近的词（拼错），分数小于 2
+    def match_tokens(self, query):
+        scores = {}
+        for token_id in self.prefix_tokens(query):
+            scores[token_id] = 4.0 if self.tokens[token_id] == query else 3.0
+
+        query_trigrams = get_trigrams(query)
+        if not query_trigrams:
+            return scores
+
+        hits = {}
+        for trigram in query_trigrams:
+            for token_id in self.trigrams.get(trigram, ()):
+                hits[token_id] = hits.get(token_id, 0) + 1
+
+        similar = {}
+        for token_id, count in hits.items():
+            if token_id in scores:
+                continue
+            token = self.tokens[token_id]
+            if count == len(query_trigrams) and query in token:
+                scores[token_id] = 2.0
+            elif not scores:
+                similarity = 2.0 * count / (len(query_trigrams) + max(1, len(token) - 2))
+                if similarity >= SEARCH_FUZZY_RATIO:
+                    similar[token_id] = 2.0 * similarity
+        return scores or similar
+
+    # 查询词与标签的匹配分数，取标签中各词的最高分
+    def match_labels(self, query):
+        scores = {}
+        for token_id, score in self.match_tokens(query).items():
+            for label_id in self.token_labels[token_id]:
+                if scores.get(label_id, 0.0) < score:
+                    scores[label_id] = score
+        return scores
+
+    # 每个查询词都要匹配路径中的某个标签，条目分数为各查询词的最高分之和
+    # 候选条目只从匹配条目最少的查询词展开，其余查询词在候选的路径上检查
+    def score_entries(self, queries, bound):
+        label_scores = [self.match_labels(query) for query in queries]
+        if not all(label_scores):
+            return {}
+
+        first = min(label_scores, key=lambda scores: sum(len(self.label_postings[label_id]) for label_id in scores))
+        candidates = set()
+        for label_id in first:
+            candidates.update(self.label_postings[label_id])
+
+        results = {}
+        entry_bound = self.bound
+        path_start = self.path_start
+        path_labels = self.path_labels
+        for entry in candidates:
+            if entry_bound[entry] != bound:
+                continue
+            path = path_labels[path_start[entry]:path_start[entry + 1]]
+            total = 0.0
+            for scores in label_scores:
+                best = 0.0
+                for label_id in path:
+                    score = scores.get(label_id)
+                    if score is not None and score > best:
+                        best = score
+                if not best:
+                    break
+                total += best
+            else:
+                results[entry] = total
+        return results
+
+    # 返回 [(名称, 标签路径)]，按分数从高到低，分数相同时短的名称在前
+    # Bound 前缀的结果带上查询末尾的字母和数字，没有时使用第一个字母和数字
+    def search(self, text, limit=SEARCH_LIMIT):
+        text = text.strip().lower()
+        queries = split_search_tokens(text)
+        if not queries:
+            return []
+
+        scores = self.score_entries(queries, 0)
+        suffix = (BOUND_LETTERS.values[0], BOUND_NUMBERS.values[0])
+        bound_queries = queries
+        match = SEARCH_BOUND_PATTERN.search(text)
+        if match:
+            suffix = (match.group(1).upper(), match.group(2))
+            bound_queries = split_search_tokens(text[:match.start()])
+        if bound_queries:
+            scores.update(self.score_entries(bound_queries, 1))
+
+        results = []
+        for entry in heapq.nsmallest(limit, scores, key=lambda entry: (-scores[entry], len(self.names[entry]), self.names[entry])):
+            if self.bound[entry]:
+                results.append(('_'.join((self.names[entry],) + suffix), self.get_path(entry) + suffix))
+            else:
+                results.append((self.names[entry], self.get_path(entry)))
+        return results
+
+
+# 遍历树的所有叶子路径和 Bound 前缀建立搜索索引，不展开虚拟节点
+def build_name_search(root):
+    index = NameSearchIndex()
+    if not root:
+        return index
+
+    # 父节点总在子节点之前，按存储顺序遍历一次即可；每个标签只做一次正则
+    store = root.store
+    index.set_labels(store.labels)
+    cleaned = [re.sub(r'[^a-zA-Z0-9]', '', label) for label in store.labels]
+    paths = [()] * len(store)
+    names = [""] * len(store)
+    for i in range(root.index + 1, len(store)):
+        parent = store.parent[i]
+        label_id = store.label[i]
+        path = paths[parent] + (label_id,)
+        name = names[parent]
+        if cleaned[label_id]:
+            name = name + "_" + cleaned[label_id] if name else cleaned[label_id]
+        paths[i] = path
+        names[i] = name
+
+        if store.virtual[i]:
+            index.add_entry(name, path, True)
+        elif not store.child_count[i]:
+            index.add_entry(name, path, False)
+
+    profile_count("search_entries", len(index))
+    return index
+
+
+# ======================================================================================================================
+# 命名配置表加载：解析结果缓存到二进制文件，按 修改时间/大小 和 内容哈希 判断是否有效
+CONFIG_CACHE_VERSION = 3
+
+# 当前加载的配置 (绝对路径, 修改时间, 大小)，加载失败也会记录，避免重复尝试
+config_key = None
+
+
+def get_config_key(filepath):
+    stat = os.stat(filepath)
+    return os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size
+
+
+def get_config_cache_filepath(cache_dirpath, abspath):
+    return os.path.join(cache_dirpath, hashlib.sha1(abspath.encode('utf-8')).hexdigest() + ".tree")
+
+
+def read_config_cache(cache_filepath):
+    try:
+        with open(cache_filepath, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(cache, dict) or cache.get("version") != CONFIG_CACHE_VERSION:
+        return None
+    return cache
+
+
+# 读取命名配置表，建立树和合法名称
+# 指定 cache_dirpath 时先尝试缓存，返回是否使用了缓存
+def load_naming_config(filepath, cache_dirpath=None):
+    global tree_root, legal_names, name_search, config_key
+
+    key = get_config_key(filepath)
+    config_key = key
+    cache_filepath = get_config_cache_filepath(cache_dirpath, key[0]) if cache_dirpath else None
+
+    with profile_phase("read_cache"):
+        cache = read_config_cache(cache_filepath) if cache_filepath else None
+
+    # 修改时间和大小没变时不读配置文件，否则比较内容哈希
+    content = None
+    if cache is None or (cache["mtime"], cache["size"]) != key[1:]:
+        with profile_phase("read_json"):
+            with open(filepath, 'rb') as f:
+                content = f.read()
+            profile_count("bytes_read", len(content))
+        content_hash = hashlib.sha1(content).hexdigest()
+        if cache is not None and cache["hash"] != content_hash:
+            cache = None
+    else:
+        content_hash = cache["hash"]
+
+    from_cache = cache is not None
+    if from_cache:
+        with profile_phase("restore_cache"):
+            tree_root = TreeStore.load_state(cache["tree"]).node(0)
+            my_size_dict.clear()
+            my_size_dict.rules.update(cache["sizes"])
+            legal_names = cache["legal_names"]
+            name_search = cache["name_search"]
+    else:
+        with profile_phase("parse_tree"):
+            tree_root = parse_json_to_tree(json.loads(content.decode('utf-8')))
+        with profile_phase("legal_names"):
+            legal_names = build_legal_names(tree_root)
+        with profile_phase("name_search"):
+            name_search = build_name_search(tree_root)
+
+    # 文件内容未变但修改时间变了，也要更新缓存
+    if cache_filepath and content is not None:
+        with profile_phase("write_cache"):
+            cache = {
+                "version": CONFIG_CACHE_VERSION,
+                "mtime": key[1],
+                "size": key[2],
+                "hash": content_hash,
+                "tree": tree_root.store.dump_state(),
+                "sizes": dict(my_size_dict.rules),
+                "legal_names": legal_names,
+                "name_search": name_search,
+            }
+            try:
+                ensure_parent_dir(cache_filepath)
+                write_file_atomic(cache_filepath, pickle.dumps(cache, pickle.HIGHEST_PROTOCOL), 'wb')
+            except OSError:
+                pass
+
+    profile_count("tree_nodes", len(tree_root.store))
+    return from_cache
+
+
+# 配置文件未加载或有变化时加载，返回是否重新加载
+def ensure_naming_config(filepath, cache_dirpath=None):
+    try:
+        key = get_config_key(filepath)
+    except OSError:
+        return False
+
+    if key == config_key:
+        return False
+
+    load_naming_config(filepath, cache_dirpath)
+    return True
+
+
+# ======================================================================================================================
+# 基础名字索引：基础名字 -> 物体
+BASE_NAME_PATTERN = re.compile(r'\.\d{3}')
+
+
+def get_base_name(name):
+    return BASE_NAME_PATTERN.split(name, 1)[0]
+
+
+# get_all_objects() 返回场景中的全部物体，物体需要提供 name 和 as_pointer()
+class ObjectNameIndex:
+    def __init__(self, get_all_objects):
+        self.get_all_objects = get_all_objects
+        self.groups = {}
+        self.bases = {}
+        self.object_count = -1
+
+    def mark_dirty(self):
+        self.groups = {}
+        self.bases = {}
+        self.object_count = -1
+
+    def rebuild(self):
+        self.groups = {}
+        self.bases = {}
+        all_objects = self.get_all_objects()
+        with profile_phase("name_index_rebuild"):
+            for obj in all_objects:
+                self.add(obj)
+        self.object_count = len(all_objects)
+        profile_count("objects_scanned", len(all_objects))
+        profile_count("regex_calls", len(all_objects))
+
+    # 物体数量变化时（新增或删除）重建
+    def ensure(self):
+        if self.object_count != len(self.get_all_objects()):
+            self.rebuild()
+
+    def add(self, obj):
+        pointer = obj.as_pointer()
+        base_name = get_base_name(obj.name)
+        self.bases[pointer] = base_name
+        self.groups.setdefault(base_name, {})[pointer] = obj
+
+    # 物体被修改或重命名后更新所在分组
+    def touch(self, obj):
+        if self.object_count < 0:
+            return
+
+        pointer = obj.as_pointer()
+        base_name = get_base_name(obj.name)
+        old_base_name = self.bases.get(pointer)
+        if old_base_name == base_name:
+            return
+
+        if old_base_name is not None:
+            group = self.groups[old_base_name]
+            group.pop(pointer, None)
+            if not group:
+                del self.groups[old_base_name]
+        self.bases[pointer] = base_name
+        self.groups.setdefault(base_name, {})[pointer] = obj
+
+    # 获取同一基础名字的物体，顺带剔除已删除或改名的物体
+    def get_objects(self, base_name):
+        self.ensure()
+
+        group = self.groups.get(base_name)
+        if not group:
+            return []
+
+        objects = []
+        for pointer, obj in list(group.items()):
+            try:
+                valid = get_base_name(obj.name) == base_name
+            except ReferenceError:
+                valid = False
+
+            if valid:
+                objects.append(obj)
+            else:
+                del group[pointer]
+                self.bases.pop(pointer, None)
+
+        return objects
+
+    def stats(self, top=10):
+        self.ensure()
+        sizes = sorted(((len(group), base_name) for base_name, group in self.groups.items()), reverse=True)
+        return {
+            "objects": len(self.bases),
+            "groups": len(self.groups),
+            "largest": [(base_name, size) for size, base_name in sizes[:top]],
+        }
+
+
+# 拆分命名的前缀和数字部分，没有数字时返回 None
+def split_numbered_name(nowname):
+    # 找到最后一个下划线的位置
+    last_underscore_index = nowname.rfind('_')
+
+    # 提取前缀和数字部分
+    prefix = nowname[:last_underscore_index + 1]
+    number_part = nowname[last_underscore_index + 1:]
+    if not number_part.isdigit():
+        return prefix, None
+
+    return prefix, int(number_part)
+
+
+# 从 start 开始找到连续 count 个未被占用的编号，返回第一个编号
+def reserve_number_range(prefix, start, count, is_used):
+    run_start = start
+    number = start
+    while number - run_start < count:
+        if is_used(f"{prefix}{number:02d}"):
+            run_start = number + 1
+        number += 1
+    return run_start
+
+
+# 计算重命名计划 [(物体, 新名字)]
+# 选中物体使用当前命名，同名的未选中物体从当前编号之后预留一段连续编号
+def plan_renames(now_name, selected_objects, get_group, is_used, sync):
+    selected = sorted(selected_objects, key=lambda obj: obj.name)
+    selected_set = set(selected)
+    plan = [(obj, now_name) for obj in selected]
+    if not sync:
+        return plan
+
+    # 每个基础名字只处理一次
+    siblings = []
+    seen_base_names = set()
+    for obj in selected:
+        base_name = get_base_name(obj.name)
+        if base_name in seen_base_names:
+            continue
+        seen_base_names.add(base_name)
+        siblings.extend(sorted((other for other in get_group(base_name) if other not in selected_set), key=lambda other: other.name))
+
+    if not siblings:
+        return plan
+
+    prefix, number = split_numbered_name(now_name)
+    if number is None:
+        raise ValueError(f"当前命名没有数字后缀，无法同步: {now_name}")
+
+    renamed = selected_set.union(siblings)
+    start = reserve_number_range(prefix, number + 1, len(siblings), lambda name: is_used(name, renamed))
+    plan.extend((obj, f"{prefix}{start + i:02d}") for i, obj in enumerate(siblings))
+    return plan
+
+
+# ======================================================================================================================
+# 导出检查：按物体缓存检查结果，只重新检查 depsgraph 报告修改过的物体（或网格）和改名的物体
+# 物体信息由 inspect(obj) 读取（插件中访问 bpy），非网格物体返回 None
+LINT_EPSILON = 1e-4
+LINT_LEVELS = {
+    "ILLEGAL_NAME": 'ERROR',
+    "DUPLICATE_NAME": 'ERROR',
+    "UNCLASSIFIED": 'WARNING',
+    "REFERENCE_TRANSFORM": 'WARNING',
+    "UNAPPLIED_SCALE": 'WARNING',
+}
+LINT_MESSAGES = {
+    "ILLEGAL_NAME": "名称非法",
+    "DUPLICATE_NAME": "同名物体网格不同，导出时只保留一个",
+    "UNCLASSIFIED": "复制的物体没有 Kit / Adorn 分类，导出集合时会合并进主体",
+    "REFERENCE_TRANSFORM": "基准物体的位置或旋转不是默认值",
+    "UNAPPLIED_SCALE": "缩放未应用",
+}
+
+
+def is_layout_name(name):
+    return 'Kit' in name or "Adorn" in name
+
+
+# 单个物体的问题 [(类型, 说明)]
+# 基准物体：不带 .001 后缀的装饰物，Transform 应为默认值；装饰物的副本的变换会写入布局，不检查
+def lint_object(info, legal_names):
+    name = info["name"]
+    issues = []
+
+    this_name = name.split('.')[0]
+    if legal_names is not None and this_name not in legal_names:
+        issues.append(("ILLEGAL_NAME", f"最接近的合法前缀: {legal_names.closest_prefix(this_name)}"))
+
+    layout = is_layout_name(name)
+    copy = get_base_name(name) != name
+    if copy and not layout:
+        issues.append(("UNCLASSIFIED", ""))
+
+    if not copy and layout:
+        w, x, y, z = info["rotation"]
+        if any(abs(value) > LINT_EPSILON for value in info["location"]) or any(abs(value) > LINT_EPSILON for value in (x, y, z)):
+            issues.append(("REFERENCE_TRANSFORM", ""))
+
+    if not (copy and layout) and any(abs(value - 1.0) > LINT_EPSILON for value in info["scale"]):
+        issues.append(("UNAPPLIED_SCALE", "({:.3g}, {:.3g}, {:.3g})".format(*info["scale"])))
+
+    return issues
+
+
+class ExportLint:
+    def __init__(self):
+        self.legal_names = None
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        # 物体指针 -> {"name", "base_name", "data", "mesh", "issues"}，非网格物体为 None
+        self.records = {}
+        # 基础名字 -> {网格特征: 物体数量}，有问题的物体指针
+        self.groups = {}
+        self.flagged = set()
+        self.mesh_count = 0
+        self.dirty = set()
+        self.dirty_data = set()
+        # 排序后的问题列表，记录有变化时重新生成
+        self.issues = None
+
+    # 物体被修改
+    def touch(self, pointer):
+        self.dirty.add(pointer)
+
+    # 网格数据被修改，使用它的物体都要重新检查
+    def touch_data(self, pointer):
+        self.dirty_data.add(pointer)
+
+    def check(self, obj, inspect):
+        info = inspect(obj)
+        if info is None:
+            return None
+        return {
+            "name": info["name"],
+            "base_name": get_base_name(info["name"]),
+            "data": info["data"],
+            "mesh": info["mesh"],
+            "issues": lint_object(info, self.legal_names),
+        }
+
+    def add_record(self, pointer, record):
+        self.records[pointer] = record
+        self.issues = None
+        if record is None:
+            return
+        self.mesh_count += 1
+        group = self.groups.setdefault(record["base_name"], {})
+        group[record["mesh"]] = group.get(record["mesh"], 0) + 1
+        if record["issues"]:
+            self.flagged.add(pointer)
+
+    def remove_record(self, pointer):
+        record = self.records.pop(pointer)
+        self.issues = None
+        if record is None:
+            return
+        self.mesh_count -= 1
+        group = self.groups[record["base_name"]]
+        group[record["mesh"]] -= 1
+        if not group[record["mesh"]]:
+            del group[record["mesh"]]
+            if not group:
+                del self.groups[record["base_name"]]
+        self.flagged.discard(pointer)
+
+    # 线性扫描所有物体，返回 {"objects": 网格物体数量, "checked", "issues": [(级别, 类型, 名称, 说明)]}
+    def run(self, objects, inspect, legal_names):
+        # 命名配置表变了，名称检查要全部重做
+        if legal_names is not self.legal_names:
+            self.mark_dirty()
+            self.legal_names = legal_names
+
+        records = self.records
+        dirty = self.dirty
+        dirty_data = self.dirty_data
+        pointers = []
+        checked = 0
+        with profile_phase("lint_scan"):
+            for obj in objects:
+                pointer = obj.as_pointer()
+                pointers.append(pointer)
+                if pointer in records:
+                    record = records[pointer]
+                    if pointer not in dirty and (record is None or (record["data"] not in dirty_data and record["name"] == obj.name)):
+                        continue
+
+                    # 重新检查后没有变化（例如只移动了副本）时不用重新生成问题列表
+                    checked += 1
+                    new_record = self.check(obj, inspect)
+                    if new_record == record:
+                        continue
+                    self.remove_record(pointer)
+                    self.add_record(pointer, new_record)
+                    continue
+
+                self.add_record(pointer, self.check(obj, inspect))
+                checked += 1
+
+            # 删除的物体
+            if len(records) != len(pointers):
+                for pointer in records.keys() - set(pointers):
+                    self.remove_record(pointer)
+
+        self.dirty = set()
+        self.dirty_data = set()
+        profile_count("objects_scanned", len(pointers))
+        profile_count("objects_linted", checked)
+
+        if self.issues is None:
+            issues = []
+            for pointer in self.flagged:
+                record = records[pointer]
+                for code, detail in record["issues"]:
+                    issues.append((LINT_LEVELS[code], code, record["name"], detail))
+
+            for base_name, group in self.groups.items():
+                if len(group) > 1:
+                    issues.append((LINT_LEVELS["DUPLICATE_NAME"], "DUPLICATE_NAME", base_name, f"{len(group)} 种网格"))
+
+            issues.sort(key=lambda issue: (issue[0] != 'ERROR', issue[1], issue[2]))
+            self.issues = issues
+        return {"objects": self.mesh_count, "checked": checked, "issues": self.issues}
+
+
+# ======================================================================================================================
+# 确定保存路径（相对导出根目录，不创建文件夹）
+def create_path_from_name(obj_name, folder_type):
+    path_parts = obj_name.split('_')
+
+    # 如果名称中没有下划线，就直接使用该名称作为文件夹名称和子目录
+    if len(path_parts) == 1:
+        sub_dir = ''
+        folder_name = obj_name
+    else:
+        sub_dir = os.path.join(*path_parts[:-1])
+        folder_name = '_'.join(path_parts[:-1])
+
+    full_path = os.path.join(
+        sub_dir, folder_name, folder_type
+    )
+
+    return full_path
+
+
+# Unity 项目中的导出根目录
+def get_export_prefix(unity_dirpath):
+    return os.path.join(unity_dirpath, "Assets", "MyTool_Blender") + os.sep
+
+
+# 物体的 FBX 文件，同一基础名字共用一个文件
+def get_fbx_filepath(prefix, obj_name):
+    return os.path.join(prefix, create_path_from_name(obj_name, "Fbx"), f"{get_base_name(obj_name)}.fbx")
+
+
+# 集合的主体 FBX 和布局文件
+def get_collection_filepaths(prefix, collection_name):
+    export_filepath = os.path.join(prefix, collection_name, "Json")
+    return os.path.join(export_filepath, f"{collection_name}.fbx"), os.path.join(export_filepath, f"{collection_name}.json")
+
+
+# 导出清单中的键：相对导出根目录，统一使用 "/"
+def get_manifest_key(prefix, filepath):
+    return os.path.relpath(filepath, prefix).replace('\\', '/')
+
+
+def ensure_parent_dir(filepath):
+    dirpath = os.path.dirname(filepath)
+    if dirpath:
+        os.makedirs(dirpath, exist_ok=True)
+
+
+# ======================================================================================================================
+# FBX 导出设置，同时参与导出缓存的哈希
+FBX_EXPORT_SETTINGS = {
+    "use_selection": True,
+    "apply_unit_scale": True,
+    "use_space_transform": True,
+    "bake_space_transform": True,
+    "global_scale": 1,
+}
+
+# 以 "." 开头，Unity 不会导入，也不会被 "*.json" 搜索到
+FBX_MANIFEST_NAME = ".fbx_manifest"
+FBX_MANIFEST_VERSION = 1
+
+
+# 先写临时文件再替换，避免留下写了一半的文件
+def write_file_atomic(filepath, content, mode='w'):
+    temp_filepath = filepath + ".tmp"
+    try:
+        if 'b' in mode:
+            with open(temp_filepath, mode) as f:
+                f.write(content)
+        else:
+            with open(temp_filepath, mode, encoding='utf-8') as f:
+                f.write(content)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        remove_file(temp_filepath)
+        raise
+    profile_count("bytes_written", os.path.getsize(filepath))
+
+
+# FBX 导出的临时文件：以 "." 开头 Unity 不会导入，保留扩展名导出器不会再追加 .fbx
+def get_temp_filepath(filepath):
+    dirpath, filename = os.path.split(filepath)
+    name, ext = os.path.splitext(filename)
+    return os.path.join(dirpath, f".{name}.tmp{ext}")
+
+
+def remove_file(filepath):
+    try:
+        os.remove(filepath)
+    except OSError:
+        pass
+
+
+# 读取导出清单: 文件相对路径 -> 内容哈希
+def load_fbx_manifest(prefix):
+    manifest_filepath = os.path.join(prefix, FBX_MANIFEST_NAME)
+    if not os.path.exists(manifest_filepath):
+        return {}
+
+    try:
+        with open(manifest_filepath, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get("version") != FBX_MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_fbx_manifest(prefix, files):
+    manifest = {"version": FBX_MANIFEST_VERSION, "files": files}
+    write_file_atomic(os.path.join(prefix, FBX_MANIFEST_NAME), json.dumps(manifest, separators=(',', ':'), sort_keys=True))
+
+
+# 按顶点数贪心分配，让每个分片的工作量接近
+def split_export_shards(jobs, shard_count):
+    shards = [[] for _ in range(shard_count)]
+    heap = [(0, i) for i in range(shard_count)]
+
+    for job in sorted(jobs, key=lambda job: job["cost"], reverse=True):
+        cost, i = heapq.heappop(heap)
+        shards[i].append(job)
+        heapq.heappush(heap, (cost + job["cost"], i))
+
+    return [shard for shard in shards if shard]
+
+
+# ======================================================================================================================
+# 布局文件格式
+# 版本 1：每个物体一条记录，位置/旋转/缩放为 Vector、Euler 的字符串
+# 版本 2：names 与三个扁平数组一一对应，position(xyz) / rotation(四元数 wxyz) / scale(xyz)，均为 Blender 坐标系
+LAYOUT_FORMAT = "MyToolLayout"
+LAYOUT_VERSION = 2
+
+LAYOUT_VECTOR_PATTERN = re.compile(r"<Vector \(([^,]+), ([^,]+), ([^,]+)\)>")
+LAYOUT_EULER_PATTERN = re.compile(r"<Euler \(x=([^,]+), y=([^,]+), z=([^,]+)\), order='XYZ'>")
+
+
+# 每个数组的名字和每个物体的分量数
+LAYOUT_FIELDS = (("position", 3), ("rotation", 4), ("scale", 3))
+
+
+# 分块写入 JSON 数组元素，返回元素数量
+def write_json_chunks(file, texts, chunk_size):
+    count = 0
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) >= chunk_size:
+            file.write(("," if count else "") + ",".join(chunk))
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        file.write(("," if count else "") + ",".join(chunk))
+        count += len(chunk)
+    file.write("]")
+    return count
+
+
+# 9 位有效数字足以无损还原 float32
+# -0.0 写成 "-0" 会被读回为整数 0，再次写出时变成 "0"，统一写成 0
+def format_layout_value(value):
+    return format(value + 0.0, '.9g')
+
+
+# 流式写入版本 2 布局，每个数组单独遍历一次，内存占用与物体数量无关
+# iter_names() 返回名字，iter_values(field) 返回每个物体的分量序列
+def write_layout_stream(file, iter_names, iter_values, chunk_size=4096, extra=None):
+    file.write('{"format":"' + LAYOUT_FORMAT + '","version":' + str(LAYOUT_VERSION))
+    for key, value in (extra or {}).items():
+        file.write(',"' + key + '":' + json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+
+    file.write(',"names":[')
+    count = write_json_chunks(file, (json.dumps(name, ensure_ascii=False) for name in iter_names()), chunk_size)
+
+    for field, _ in LAYOUT_FIELDS:
+        file.write(',"' + field + '":[')
+        write_json_chunks(file, (format_layout_value(value) for values in iter_values(field) for value in values), chunk_size)
+
+    file.write(',"count":' + str(count) + '}')
+    return count
+
+
+# 生成版本 2 的布局文本
+def dump_layout(names, positions, rotations, scales):
+    arrays = {"position": positions, "rotation": rotations, "scale": scales}
+    file = io.StringIO()
+    write_layout_stream(file, lambda: names, lambda field: (arrays[field],))
+    return file.getvalue()
+
+
+# 名字中带 Kit / Adorn 的是装饰物，写入布局；其余为主体
+def is_layout_object(obj):
+    return is_layout_name(obj.name)
+
+
+# 一次取出布局数据，供线程池写入（线程中不访问 bpy）
+# 内存占用与装饰物数量成正比：稳定 id、补丁比较和分块都需要完整的数据，只有写文件是流式的
+def collect_layout(iter_names, iter_values):
+    names = list(iter_names())
+    arrays = {field: array('d', (value for values in iter_values(field) for value in values)) for field, _ in LAYOUT_FIELDS}
+    return names, arrays
+
+
+# 写入文件的同时计算内容哈希（与 hash_layout_text 读回整个文件的结果相同）
+class HashingWriter:
+    def __init__(self, file):
+        self.file = file
+        self.hasher = hashlib.sha1()
+
+    def write(self, text):
+        self.file.write(text)
+        self.hasher.update(text.encode('utf-8'))
+
+
+# 流式写入临时文件后替换，返回 (数量, 内容哈希)
+def write_layout_file(filepath, iter_names, iter_values, extra=None):
+    temp_filepath = filepath + ".tmp"
+    try:
+        with open(temp_filepath, 'w', encoding='utf-8', newline='') as json_file:
+            writer = HashingWriter(json_file)
+            count = write_layout_stream(writer, iter_names, iter_values, extra=extra)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        remove_file(temp_filepath)
+        raise
+    profile_count("bytes_written", os.path.getsize(filepath))
+    return count, writer.hasher.hexdigest()
+
+
+def write_layout_arrays(filepath, names, arrays, extra=None):
+    return write_layout_file(filepath, lambda: names, lambda field: (arrays[field],), extra)
+
+
+# 与写入时相同的精度取整，读回文件得到的就是这些值
+def round_layout_values(values):
+    return [float(format_layout_value(value)) for value in values]
+
+
+# 实例表：版本 2 布局，另带网格文件列表 meshes 和每个实例的网格下标 mesh
+def read_instance_table(filepath):
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(table, dict) or table.get("version", 1) < 2 or "meshes" not in table or "mesh" not in table:
+        return None
+    return table
+
+
+# 只导出部分物体时合并到已有的实例表：本次导出的物体替换同名条目，其余条目保留
+# 网格列表去重后重新编号，写入临时文件后替换，返回实例总数
+def write_instance_table(filepath, names, meshes, mesh, arrays):
+    base = read_instance_table(filepath)
+    if base is not None:
+        exported = set(names)
+        meshes = list(meshes)
+        mesh_indices = {mesh_key: i for i, mesh_key in enumerate(meshes)}
+        names = list(names)
+        mesh = list(mesh)
+        arrays = {field: list(arrays[field]) for field, _ in LAYOUT_FIELDS}
+        for i, name in enumerate(base["names"]):
+            if name in exported:
+                continue
+            mesh_key = base["meshes"][base["mesh"][i]]
+            if mesh_key not in mesh_indices:
+                mesh_indices[mesh_key] = len(meshes)
+                meshes.append(mesh_key)
+            names.append(name)
+            mesh.append(mesh_indices[mesh_key])
+            for field, size in LAYOUT_FIELDS:
+                arrays[field].extend(base[field][i * size:(i + 1) * size])
+
+    ensure_parent_dir(filepath)
+    count, _ = write_layout_arrays(filepath, names, arrays, extra={"meshes": meshes, "mesh": mesh})
+    return count
+
+
+# XYZ 欧拉角转四元数 (w, x, y, z)
+def euler_to_quaternion(x, y, z):
+    cx, sx = math.cos(x * 0.5), math.sin(x * 0.5)
+    cy, sy = math.cos(y * 0.5), math.sin(y * 0.5)
+    cz, sz = math.cos(z * 0.5), math.sin(z * 0.5)
+    return (
+        cx * cy * cz + sx * sy * sz,
+        sx * cy * cz - cx * sy * sz,
+        cx * sy * cz + sx * cy * sz,
+        cx * cy * sz - sx * sy * cz,
+    )
+
+
+# 参考读取：兼容版本 1 和版本 2，返回 [{"name", "position", "rotation", "scale"}]
+def read_layout(text):
+    layout = json.loads(text)
+
+    items = []
+    if layout.get("version", 1) >= 2:
+        positions = layout["position"]
+        rotations = layout["rotation"]
+        scales = layout["scale"]
+        for i, name in enumerate(layout["names"]):
+            items.append({
+                "name": name,
+                "position": tuple(positions[i * 3:i * 3 + 3]),
+                "rotation": tuple(rotations[i * 4:i * 4 + 4]),
+                "scale": tuple(scales[i * 3:i * 3 + 3]),
+            })
+        return items
+
+    for item in layout["items"]:
+        data = {}
+        for entry in item["data"]:
+            data.update(entry)
+        euler = [float(value) for value in LAYOUT_EULER_PATTERN.match(data["euler"]).groups()]
+        items.append({
+            "name": item["name"],
+            "position": tuple(float(value) for value in LAYOUT_VECTOR_PATTERN.match(data["location"]).groups()),
+            "rotation": euler_to_quaternion(*euler),
+            "scale": tuple(float(value) for value in LAYOUT_VECTOR_PATTERN.match(data["scale"]).groups()),
+        })
+    return items
+
+
+# ======================================================================================================================
+# 分块布局：装饰物按相对主体的位置分到均匀网格（XY 平面）或八叉树中，每块写一个版本 2 布局文件，另写一个索引
+# 索引记录每块的文件名、数量和包围盒（装饰物原点），读取方只加载需要的区域
+LAYOUT_INDEX_FORMAT = "MyToolLayoutIndex"
+LAYOUT_INDEX_VERSION = 1
+LAYOUT_CHUNK_DIRNAME = "Chunks"
+LAYOUT_CHUNK_MODES = ('GRID', 'OCTREE')
+OCTREE_MAX_DEPTH = 8
+
+
+def get_layout_index_filepath(json_filepath):
+    dirpath, filename = os.path.split(json_filepath)
+    return os.path.join(dirpath, LAYOUT_CHUNK_DIRNAME, os.path.splitext(filename)[0] + ".index.json")
+
+
+# 网格：每个格子 cell_size 见方，返回 [(块名, 下标列表)]
+def split_layout_grid(positions, cell_size):
+    cells = {}
+    for i in range(len(positions) // 3):
+        key = (math.floor(positions[i * 3] / cell_size), math.floor(positions[i * 3 + 1] / cell_size))
+        cells.setdefault(key, []).append(i)
+    return [(f"{x}_{y}", indices) for (x, y), indices in sorted(cells.items())]
+
+
+# 八叉树：从包围所有装饰物的立方体开始，超过 capacity 个的节点继续八等分，块名为从根开始的卦限编号
+def split_layout_octree(positions, capacity):
+    count = len(positions) // 3
+    if not count:
+        return []
+
+    low = [min(positions[axis::3]) for axis in range(3)]
+    high = [max(positions[axis::3]) for axis in range(3)]
+    half = max(max(h - l for l, h in zip(low, high)) * 0.5, 1e-6)
+    center = [(l + h) * 0.5 for l, h in zip(low, high)]
+
+    chunks = []
+    stack = [("r", center, half, list(range(count)), 0)]
+    while stack:
+        key, center, half, indices, depth = stack.pop()
+        if len(indices) <= capacity or depth >= OCTREE_MAX_DEPTH:
+            chunks.append((key, indices))
+            continue
+
+        children = [[] for _ in range(8)]
+        for i in indices:
+            octant = 0
+            for axis in range(3):
+                if positions[i * 3 + axis] >= center[axis]:
+                    octant |= 1 << axis
+            children[octant].append(i)
+
+        half *= 0.5
+        for octant in reversed(range(8)):
+            if children[octant]:
+                child_center = [center[axis] + (half if octant >> axis & 1 else -half) for axis in range(3)]
+                stack.append((key + str(octant), child_center, half, children[octant], depth + 1))
+
+    return chunks
+
+
+def split_layout_chunks(positions, mode, cell_size, capacity):
+    if mode == 'GRID':
+        return split_layout_grid(positions, cell_size)
+    if mode == 'OCTREE':
+        return split_layout_octree(positions, capacity)
+    raise ValueError(f"未知的分块方式: {mode}")
+
+
+# 写入分块文件和索引，删除上一次导出留下的分块，返回块数
+def write_layout_chunks(json_filepath, ids, names, arrays, mode, cell_size=50.0, capacity=1024):
+    index_filepath = get_layout_index_filepath(json_filepath)
+    chunk_dirpath = os.path.dirname(index_filepath)
+    os.makedirs(chunk_dirpath, exist_ok=True)
+    basename = os.path.splitext(os.path.basename(json_filepath))[0]
+
+    positions = arrays["position"]
+    entries = []
+    for key, indices in split_layout_chunks(positions, mode, cell_size, capacity):
+        chunk_arrays = {}
+        for field, size in LAYOUT_FIELDS:
+            values = arrays[field]
+            chunk_values = array('d')
+            for i in indices:
+                chunk_values.extend(values[i * size:(i + 1) * size])
+            chunk_arrays[field] = chunk_values
+        chunk_positions = chunk_arrays["position"]
+
+        file = io.StringIO()
+        extra = {"chunk": key, "ids": [ids[i] for i in indices]}
+        write_layout_stream(file, lambda: (names[i] for i in indices), lambda field: (chunk_arrays[field],), extra=extra)
+
+        filename = f"{basename}_{key}.json"
+        write_file_atomic(os.path.join(chunk_dirpath, filename), file.getvalue())
+        entries.append({
+            "key": key,
+            "file": filename,
+            "count": len(indices),
+            "min": [min(chunk_positions[axis::3]) for axis in range(3)],
+            "max": [max(chunk_positions[axis::3]) for axis in range(3)],
+        })
+
+    filenames = {entry["file"] for entry in entries}
+    filenames.add(os.path.basename(index_filepath))
+    for filename in os.listdir(chunk_dirpath):
+        if filename.endswith(".json") and filename not in filenames:
+            remove_file(os.path.join(chunk_dirpath, filename))
+
+    index = {
+        "format": LAYOUT_INDEX_FORMAT,
+        "version": LAYOUT_INDEX_VERSION,
+        "mode": mode,
+        "cell_size": cell_size if mode == 'GRID' else None,
+        "capacity": capacity if mode == 'OCTREE' else None,
+        "count": len(names),
+        "chunks": entries,
+    }
+    write_file_atomic(index_filepath, json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+    return len(entries)
+
+
+# 参考读取：只加载包围盒与 bounds (min, max) 相交的分块，bounds 为 None 时加载全部
+def read_layout_chunks(index_filepath, bounds=None):
+    with open(index_filepath, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    items = []
+    dirpath = os.path.dirname(index_filepath)
+    for chunk in index["chunks"]:
+        if bounds is not None and any(chunk["min"][axis] > bounds[1][axis] or chunk["max"][axis] < bounds[0][axis] for axis in range(3)):
+            continue
+        with open(os.path.join(dirpath, chunk["file"]), 'r', encoding='utf-8') as f:
+            items.extend(read_layout(f.read()))
+    return items
+
+
+# ======================================================================================================================
+# 布局补丁：装饰物带稳定 id（物体自定义属性），与上一次导出的完整布局（快照）比较，只记录新增、删除、移动的条目
+# 完整布局按快照中的顺序写入，新增（或改名）的条目排在最后，应用补丁得到的布局与完整布局逐字节一致
+LAYOUT_ID_PROPERTY = "mytool_id"
+LAYOUT_PATCH_FORMAT = "MyToolLayoutPatch"
+LAYOUT_PATCH_VERSION = 1
+# 补丁放在子文件夹中，Unity 在 Json 文件夹中只读取第一个 *.json
+LAYOUT_PATCH_DIRNAME = "Patches"
+
+
+def new_layout_id():
+    return uuid.uuid4().hex[:12]
+
+
+def get_layout_patch_filepath(json_filepath):
+    dirpath, filename = os.path.split(json_filepath)
+    return os.path.join(dirpath, LAYOUT_PATCH_DIRNAME, os.path.splitext(filename)[0] + ".patch.json")
+
+
+def hash_layout_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# 读取带 id 的完整布局，返回 (布局, 哈希)，文件不存在或没有 id 时返回 (None, None)
+def read_layout_snapshot(filepath):
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            text = f.read()
+        layout = json.loads(text)
+    except (OSError, ValueError):
+        return None, None
+
+    if layout.get("version", 1) < 2 or "ids" not in layout:
+        return None, None
+    return layout, hash_layout_text(text)
+
+
+def dump_layout_snapshot(layout):
+    file = io.StringIO()
+    write_layout_stream(file, lambda: layout["names"], lambda field: (layout[field],), extra={"ids": layout["ids"]})
+    return file.getvalue()
+
+
+# 分配 id：已有且不重复的 id 保留（复制物体时 id 会被一起复制，重复时名字与快照一致的物体优先）
+# 缺少 id 的物体沿用快照中同名且未被使用的 id（.blend 未保存时），否则生成新 id
+def assign_layout_ids(names, ids, base=None):
+    base_names = dict(zip(base["ids"], base["names"])) if base else {}
+
+    owners = {}
+    for i, item_id in enumerate(ids):
+        if item_id and item_id not in owners and base_names.get(item_id) == names[i]:
+            owners[item_id] = i
+    for i, item_id in enumerate(ids):
+        if item_id and item_id not in owners:
+            owners[item_id] = i
+
+    unused = {}
+    for item_id, name in base_names.items():
+        if item_id not in owners:
+            unused.setdefault(name, deque()).append(item_id)
+
+    result = list(ids)
+    for i, item_id in enumerate(ids):
+        if item_id and owners[item_id] == i:
+            continue
+
+        candidates = unused.get(names[i])
+        item_id = candidates.popleft() if candidates else new_layout_id()
+        while item_id in owners:
+            item_id = new_layout_id()
+        owners[item_id] = i
+        result[i] = item_id
+    return result
+
+
+# 写入顺序：快照中的条目保持原顺序，其余按当前顺序排在后面
+def order_layout_items(ids, names, base=None):
+    if base is None:
+        return list(range(len(ids)))
+
+    base_index = {key: i for i, key in enumerate(zip(base["ids"], base["names"]))}
+    tail = len(base_index)
+    return sorted(range(len(ids)), key=lambda i: base_index.get((ids[i], names[i]), tail + i))
+
+
+# 比较两个布局，改名的条目记为删除后新增
+# target 可以是内存中的数组（未取整），逐条按写入精度取整后比较
+def diff_layouts(base, target, base_hash, target_hash):
+    base_index = {item_id: i for i, item_id in enumerate(base["ids"])}
+    removed = []
+    added = {"ids": [], "names": [], "position": [], "rotation": [], "scale": []}
+    moved = {"ids": [], "position": [], "rotation": [], "scale": []}
+
+    for i, item_id in enumerate(target["ids"]):
+        j = base_index.pop(item_id, None)
+        if j is not None and base["names"][j] == target["names"][i]:
+            values = [(field, round_layout_values(target[field][i * size:(i + 1) * size])) for field, size in LAYOUT_FIELDS]
+            if any(base[field][j * size:(j + 1) * size] != value for (field, size), (_, value) in zip(LAYOUT_FIELDS, values)):
+                moved["ids"].append(item_id)
+                for field, value in values:
+                    moved[field].extend(value)
+            continue
+
+        if j is not None:
+            removed.append(item_id)
+        added["ids"].append(item_id)
+        added["names"].append(target["names"][i])
+        for field, size in LAYOUT_FIELDS:
+            added[field].extend(round_layout_values(target[field][i * size:(i + 1) * size]))
+
+    removed.extend(base_index)
+    return {
+        "format": LAYOUT_PATCH_FORMAT,
+        "version": LAYOUT_PATCH_VERSION,
+        "base": base_hash,
+        "target": target_hash,
+        "removed": removed,
+        "added": added,
+        "moved": moved,
+    }
+
+
+def apply_layout_patch(base, patch):
+    removed = set(patch["removed"])
+    moved = patch["moved"]
+    moved_index = {item_id: i for i, item_id in enumerate(moved["ids"])}
+
+    layout = {"ids": [], "names": [], "position": [], "rotation": [], "scale": []}
+    for j, item_id in enumerate(base["ids"]):
+        if item_id in removed:
+            continue
+
+        layout["ids"].append(item_id)
+        layout["names"].append(base["names"][j])
+        source, k = (moved, moved_index[item_id]) if item_id in moved_index else (base, j)
+        for field, size in LAYOUT_FIELDS:
+            layout[field].extend(source[field][k * size:(k + 1) * size])
+
+    added = patch["added"]
+    layout["ids"].extend(added["ids"])
+    layout["names"].extend(added["names"])
+    for field, _ in LAYOUT_FIELDS:
+        layout[field].extend(added[field])
+    return layout
+
+
+# 校验补丁：基准哈希一致，应用到基准布局后重新生成的文本与目标完整布局逐字节一致
+def verify_layout_patch(base_text, patch, target_text):
+    if hash_layout_text(base_text) != patch["base"] or hash_layout_text(target_text) != patch["target"]:
+        return False
+    return dump_layout_snapshot(apply_layout_patch(json.loads(base_text), patch)) == target_text
+
+
+def patch_stats(patch):
+    return len(patch["added"]["ids"]), len(patch["removed"]), len(patch["moved"]["ids"])
+
+
+# 流式写入完整布局（带 id），有快照时同时写入补丁，返回 (数量, 补丁)，没有快照时补丁为 None
+# 补丁直接由内存中的数据和快照生成，不读回刚写入的布局
+def write_layout_with_patch(filepath, ids, names, arrays, base=None, base_hash=None):
+    count, target_hash = write_layout_arrays(filepath, names, arrays, extra={"ids": ids})
+
+    patch_filepath = get_layout_patch_filepath(filepath)
+    if base is None:
+        # 旧补丁的基准已不存在
+        remove_file(patch_filepath)
+        return count, None
+
+    target = dict(arrays, ids=ids, names=names)
+    patch = diff_layouts(base, target, base_hash, target_hash)
+    ensure_parent_dir(patch_filepath)
+    write_file_atomic(patch_filepath, json.dumps(patch, ensure_ascii=False, separators=(',', ':')))
+    return count, patch
+
+
+# ======================================================================================================================
+# 分步任务队列：任务是生成器，每次 next() 执行一小步，由调用方按时间片驱动，界面不会卡住
+# yield (阶段, 完成数, 总数) 更新进度，yield None 表示在等待外部进程；return 的值交给 on_finish
+# 取消时对生成器调用 close()，由其中的 finally 清理临时文件
+JOB_WAIT_INTERVAL = 0.1
+JOB_SLICE_INTERVAL = 0.01
+JOB_MESSAGE_LIMIT = 200
+
+
+class JobQueue:
+    def __init__(self, time_slice=0.05):
+        self.time_slice = time_slice
+        self.jobs = deque()
+        self.current = None
+        self.last_job = None
+        self.submitted = 0
+        self.progress = ("", 0, 0)
+        self.messages = deque(maxlen=JOB_MESSAGE_LIMIT)
+        self.error_count = 0
+
+    @property
+    def busy(self):
+        return self.current is not None or bool(self.jobs)
+
+    def __len__(self):
+        return len(self.jobs) + (self.current is not None)
+
+    # 信息记录在队列中供界面显示，同时输出到控制台
+    def report(self, level, message):
+        if level == 'ERROR':
+            self.error_count += 1
+        self.messages.append((level, message))
+        print(f"MyTool: {level}: {message}", flush=True)
+
+    # on_done 中的函数无论任务完成、失败还是取消都会调用
+    def submit(self, name, steps, on_finish=None):
+        if not self.busy:
+            self.messages.clear()
+            self.error_count = 0
+
+        job = {"name": name, "steps": steps, "on_finish": on_finish, "on_done": []}
+        self.jobs.append(job)
+        self.last_job = job
+        self.submitted += 1
+        return job
+
+    def finish(self, job, result=None, error=None, cancelled=False):
+        if self.current is job:
+            self.current = None
+
+        if error is None and not cancelled and job["on_finish"] is not None:
+            try:
+                job["on_finish"](result)
+            except Exception as e:
+                error = e
+
+        if error is not None:
+            self.report('ERROR', f"{job['name']} 失败: {error}")
+        elif cancelled:
+            self.report('WARNING', f"{job['name']} 已取消")
+
+        for on_done in job["on_done"]:
+            on_done()
+
+    # 取消当前和排队中的任务
+    def cancel(self):
+        job = self.current
+        if job is not None:
+            try:
+                job["steps"].close()
+            except Exception as e:
+                self.finish(job, error=e)
+            else:
+                self.finish(job, cancelled=True)
+
+        while self.jobs:
+            self.finish(self.jobs.popleft(), cancelled=True)
+
+    # 执行一个时间片，返回下次执行的间隔，没有任务时返回 None
+    def run_slice(self):
+        deadline = time.perf_counter() + self.time_slice
+        while True:
+            if self.current is None:
+                if not self.jobs:
+                    return None
+                self.current = self.jobs.popleft()
+                self.progress = (self.current["name"], 0, 0)
+
+            job = self.current
+            try:
+                step = next(job["steps"])
+            except StopIteration as e:
+                self.finish(job, result=e.value)
+                continue
+            except Exception as e:
+                self.finish(job, error=e)
+                continue
+
+            if step is None:
+                return JOB_WAIT_INTERVAL
+
+            self.progress = step
+            if time.perf_counter() >= deadline:
+                return JOB_SLICE_INTERVAL
+
+
+# 同步执行分步任务（命令行），返回生成器的返回值
+def run_steps(steps):
+    while True:
+        try:
+            step = next(steps)
+        except StopIteration as e:
+            return e.value
+
+        if step is None:
+            time.sleep(JOB_WAIT_INTERVAL)
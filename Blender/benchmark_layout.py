@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+
+# 用法: python benchmark_layout.py [物体数量]
+#   或: blender -b --factory-startup --python benchmark_layout.py -- [物体数量]
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from MyTool_Core import dump_layout, read_layout, euler_to_quaternion
+
+
+# ======================================================================================================================
+# 生成模拟数据
+def make_items(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        items.append({
+            "name": f"Building_StructureKit_Lamp_{chr(ord('A') + i % 26)}_{i % 10:02d}.{i:03d}",
+            "position": tuple(rng.uniform(-500.0, 500.0) for _ in range(3)),
+            "euler": tuple(rng.uniform(-math.pi, math.pi) for _ in range(3)),
+            "scale": tuple(rng.uniform(0.5, 2.0) for _ in range(3)),
+        })
+    return items
+
+
+# 版本 1：与 Blender 中 f"{Vector}" / f"{Euler}" 的输出一致
+def dump_layout_v1(items):
+    base_structures = {"items": []}
+    for item in items:
+        structure = {"name": item["name"], "data": []}
+        structure["data"].append({"location": "<Vector ({:.4f}, {:.4f}, {:.4f})>".format(*item["position"])})
+        structure["data"].append({"euler": "<Euler (x={:.4f}, y={:.4f}, z={:.4f}), order='XYZ'>".format(*item["euler"])})
+        structure["data"].append({"scale": "<Vector ({:.4f}, {:.4f}, {:.4f})>".format(*item["scale"])})
+        base_structures["items"].append(structure)
+    return json.dumps(base_structures, ensure_ascii=False, indent=2)
+
+
+def dump_layout_v2(items):
+    names = []
+    positions = []
+    rotations = []
+    scales = []
+    for item in items:
+        names.append(item["name"])
+        positions.extend(item["position"])
+        rotations.extend(euler_to_quaternion(*item["euler"]))
+        scales.extend(item["scale"])
+    return dump_layout(names, positions, rotations, scales)
+
+
+# 取多次运行中的最短时间
+def best_time(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# ======================================================================================================================
+def main(argv):
+    count = int(argv[0]) if argv else 20000
+    repeat = 5
+    items = make_items(count)
+
+    results = {"count": count}
+    for version, dump in (("v1", dump_layout_v1), ("v2", dump_layout_v2)):
+        write_time, text = best_time(lambda: dump(items), repeat)
+        parse_time, parsed = best_time(lambda: read_layout(text), repeat)
+        assert len(parsed) == count
+
+        results[version] = {
+            "bytes": len(text.encode('utf-8')),
+            "write_ms": round(write_time * 1000, 2),
+            "parse_ms": round(parse_time * 1000, 2),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:])
@@ -0,0 +1,377 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import fnmatch
+import argparse
+import platform
+from array import array
+
+# 用法: python benchmark_suite.py [--quick] [--output 结果.json] [--baseline 上次结果.json] [--max-ratio 1.25] [--threshold 用例=倍数]
+#   或: blender -b --factory-startup --python benchmark_suite.py -- [参数]
+# 有用例比基准慢超过阈值时返回码为 1
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from MyTool_Core import (
+    ExportLint, ObjectNameIndex, assign_layout_ids, build_legal_names, build_name_search, check_names,
+    euler_to_quaternion, get_base_name, get_layout_index_filepath, get_layout_patch_filepath, load_naming_config,
+    parse_json_to_tree, plan_renames, read_layout, read_layout_chunks, read_layout_snapshot, verify_layout_patch,
+    write_layout_chunks, write_layout_with_patch,
+)
+from benchmark_layout import make_items, dump_layout_v2
+
+
+# ======================================================================================================================
+# 模拟命名配置表：depth 层，每层 width 个节点，最后一层按 bound_ratio 的比例带 Bound
+CONFIGS = {
+    "small": {"depth": 3, "width": 4, "bound_ratio": 0.5},
+    "medium": {"depth": 4, "width": 8, "bound_ratio": 0.5},
+    "large": {"depth": 4, "width": 16, "bound_ratio": 0.8},
+}
+
+# 模拟场景：物体数量，以及每个基础名字平均有多少个副本 (.001, .002 ...)
+SCENES = {
+    "small": {"objects": 1000, "copies": 4},
+    "large": {"objects": 50000, "copies": 8},
+}
+
+QUICK_CONFIGS = ("small", "medium")
+QUICK_SCENES = ("small",)
+
+
+def make_config(depth, width, bound_ratio, seed=0):
+    rng = random.Random(seed)
+
+    def make_topics(level):
+        topics = []
+        for i in range(width):
+            topic = {"title": f"L{level}N{i}_节点"}
+            if level + 1 < depth:
+                topic["topics"] = make_topics(level + 1)
+            elif rng.random() < bound_ratio:
+                topic["topics"] = [{"title": "Bound", "topics": [{"title": rng.choice("SML")}]}]
+            topics.append(topic)
+        return topics
+
+    return [{"title": "命名配置表", "topics": make_topics(0)}]
+
+
+# 随机取树中的路径，遇到 Bound 时继续取字母和数字
+def sample_paths(root, count, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        path = []
+        node = root
+        while True:
+            items = node.get_enum_items()
+            if not items:
+                break
+            value = rng.choice(items)[0]
+            path.append(value)
+            node = node.get_child(value)
+        paths.append(path)
+    return paths
+
+
+# ======================================================================================================================
+# bpy.data / bpy.context 的最小替身：只提供插件用到的属性
+class FakeObject:
+    def __init__(self, name, pointer):
+        self.name = name
+        self.pointer = pointer
+
+    def as_pointer(self):
+        return self.pointer
+
+
+class FakeData:
+    def __init__(self, objects):
+        self.objects = objects
+
+
+class FakeContext:
+    def __init__(self, data, selected_objects):
+        self.data = data
+        self.selected_objects = selected_objects
+
+
+# 导出检查读取的物体信息：网格按基础名字区分，变换为默认值
+def inspect_fake_object(obj):
+    return {
+        "name": obj.name,
+        "data": obj.pointer,
+        "mesh": (len(get_base_name(obj.name)), 1),
+        "location": (0.0, 0.0, 0.0),
+        "rotation": (1.0, 0.0, 0.0, 0.0),
+        "scale": (1.0, 1.0, 1.0),
+    }
+
+
+# 场景物体使用合法名字，同名副本加 .001 后缀，约 1% 的名字非法
+def make_scene(legal_names, objects, copies, seed=0):
+    rng = random.Random(seed)
+    names = sorted(legal_names.names)
+    for prefix in sorted(legal_names.bound_prefixes):
+        names.append(f"{prefix}_{rng.choice('ABC')}_0{rng.randrange(10)}")
+
+    # 和 Blender 一样，同一个名字的副本依次编号保证唯一
+    scene_objects = []
+    copy_counts = {}
+    base_count = max(1, objects // copies)
+    for i in range(base_count):
+        base_name = rng.choice(names) if rng.random() > 0.01 else f"Illegal_Name{i}"
+        for _ in range(copies):
+            if len(scene_objects) >= objects:
+                break
+            copy = copy_counts.get(base_name, 0)
+            copy_counts[base_name] = copy + 1
+            name = base_name if copy == 0 else f"{base_name}.{copy:03d}"
+            scene_objects.append(FakeObject(name, len(scene_objects) + 1))
+
+    selected_objects = rng.sample(scene_objects, min(len(scene_objects), 50))
+    return FakeContext(FakeData(scene_objects), selected_objects)
+
+
+# ======================================================================================================================
+# 运行多次，记录最短和平均时间
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"ms": round(min(times) * 1000, 3), "mean_ms": round(sum(times) / len(times) * 1000, 3)}
+
+
+def layout_arrays(items):
+    return {
+        "position": array('d', (value for item in items for value in item["position"])),
+        "rotation": array('d', (value for item in items for value in euler_to_quaternion(*item["euler"]))),
+        "scale": array('d', (value for item in items for value in item["scale"])),
+    }
+
+
+# 实际场景中 matrix_basis.decompose() 的四元数经常带有 -0.0，合成数据里补上
+def add_signed_zeros(arrays):
+    for field, size in (("position", 3), ("rotation", 4)):
+        for i in range(min(2, len(arrays[field]) // size)):
+            arrays[field][i * size + 1] = -0.0
+    return arrays
+
+
+# 布局补丁：移动几个装饰物后重新导出，记录生成补丁的时间和大小，并校验补丁能还原完整布局
+def measure_layout_patch(items, filepath, repeat, moved=5, seed=0):
+    rng = random.Random(seed)
+    names = [item["name"] for item in items]
+    ids = assign_layout_ids(names, [None] * len(names))
+    write_layout_with_patch(filepath, ids, names, add_signed_zeros(layout_arrays(items)))
+
+    base, base_hash = read_layout_snapshot(filepath)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        base_text = f.read()
+
+    moved_items = list(items)
+    for i in rng.sample(range(len(items)), min(moved, len(items))):
+        position = moved_items[i]["position"]
+        moved_items[i] = dict(moved_items[i], position=(position[0] + 1.0, position[1], position[2]))
+    arrays = add_signed_zeros(layout_arrays(moved_items))
+
+    result = measure(lambda: write_layout_with_patch(filepath, ids, names, arrays, base, base_hash), repeat)
+    _, patch = write_layout_with_patch(filepath, ids, names, arrays, base, base_hash)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if not verify_layout_patch(base_text, patch, f.read()):
+            raise AssertionError("布局补丁无法还原完整布局")
+
+    result["patch_bytes"] = os.path.getsize(get_layout_patch_filepath(filepath))
+    result["full_bytes"] = len(base_text.encode('utf-8'))
+    return result
+
+
+# 分块布局：写入所有分块和索引，以及只读取一个区域内的分块
+def measure_layout_chunks(items, filepath, repeat, mode):
+    names = [item["name"] for item in items]
+    ids = assign_layout_ids(names, [None] * len(names))
+    arrays = layout_arrays(items)
+
+    result = measure(lambda: write_layout_chunks(filepath, ids, names, arrays, mode, 100.0, 1024), repeat)
+    result["chunks"] = write_layout_chunks(filepath, ids, names, arrays, mode, 100.0, 1024)
+
+    index_filepath = get_layout_index_filepath(filepath)
+    bounds = ((-100.0, -100.0, -500.0), (100.0, 100.0, 500.0))
+    read_result = measure(lambda: read_layout_chunks(index_filepath, bounds), repeat)
+    result["region_read_ms"] = read_result["ms"]
+    result["region_items"] = len(read_layout_chunks(index_filepath, bounds))
+    return result
+
+
+def run_benchmarks(config_names, scene_names, repeat):
+    cases = {}
+    temp_dir = tempfile.mkdtemp(prefix="mytool_bench_")
+
+    for config_name in config_names:
+        config = make_config(**CONFIGS[config_name])
+
+        # 解析配置表
+        cases[f"parse/{config_name}"] = measure(lambda: parse_json_to_tree(config), repeat)
+
+        # 从文件加载：无缓存 / 有缓存
+        config_filepath = os.path.join(temp_dir, f"{config_name}.json")
+        with open(config_filepath, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False)
+        cases[f"load_config/{config_name}"] = measure(lambda: load_naming_config(config_filepath), repeat)
+        cache_dirpath = os.path.join(temp_dir, "cache")
+        load_naming_config(config_filepath, cache_dirpath)
+        cases[f"load_config_cached/{config_name}"] = measure(lambda: load_naming_config(config_filepath, cache_dirpath), repeat)
+        root = parse_json_to_tree(config)
+
+        # 下拉菜单：逐层 get_child + get_enum_items
+        paths = sample_paths(root, 2000)
+
+        def lookup():
+            for path in paths:
+                node = root
+                for value in path:
+                    node.get_enum_items()
+                    node = node.get_child(value)
+
+        cases[f"enum_lookup/{config_name}"] = measure(lookup, repeat)
+
+        # 名称搜索：建立索引，以及用路径最后三层的标签各搜索一次
+        cases[f"search_build/{config_name}"] = measure(lambda: build_name_search(root), repeat)
+        search_index = build_name_search(root)
+        queries = [" ".join(path[-3:]) for path in paths[:200]]
+
+        def search():
+            for query in queries:
+                search_index.search(query)
+
+        cases[f"search/{config_name}"] = measure(search, repeat)
+
+        # 生成合法名称
+        cases[f"legal_names/{config_name}"] = measure(lambda: build_legal_names(root), repeat)
+        legal_names = build_legal_names(root)
+
+        for scene_name in scene_names:
+            context = make_scene(legal_names, **SCENES[scene_name])
+            scene_objects = context.data.objects
+            case_suffix = f"{config_name}/{scene_name}"
+
+            # 名称检查
+            object_names = [obj.name for obj in scene_objects]
+            cases[f"validate/{case_suffix}"] = measure(lambda: check_names(object_names, legal_names), repeat)
+
+            # 同名分组：重建索引并查询选中物体的分组
+            def grouping():
+                name_index = ObjectNameIndex(lambda: context.data.objects)
+                for obj in context.selected_objects:
+                    name_index.get_objects(get_base_name(obj.name))
+
+            cases[f"grouping/{case_suffix}"] = measure(grouping, repeat)
+
+            # 重命名计划：同步所有同名物体
+            name_index = ObjectNameIndex(lambda: context.data.objects)
+            name_index.rebuild()
+            now_name = get_base_name(context.selected_objects[0].name).rsplit('_', 1)[0] + "_00"
+
+            def is_used(name, renamed):
+                return any(obj not in renamed for obj in name_index.get_objects(name))
+
+            cases[f"rename_plan/{case_suffix}"] = measure(lambda: plan_renames(now_name, context.selected_objects, name_index.get_objects, is_used, True), repeat)
+
+            # 导出检查：第一次检查所有物体 / 修改选中的物体后再检查
+            cases[f"lint_cold/{case_suffix}"] = measure(lambda: ExportLint().run(scene_objects, inspect_fake_object, legal_names), repeat)
+            export_lint = ExportLint()
+            export_lint.run(scene_objects, inspect_fake_object, legal_names)
+
+            def lint_warm():
+                for obj in context.selected_objects:
+                    export_lint.touch(obj.pointer)
+                export_lint.run(scene_objects, inspect_fake_object, legal_names)
+
+            cases[f"lint_warm/{case_suffix}"] = measure(lint_warm, repeat)
+
+    # 布局写入和读取
+    for scene_name in scene_names:
+        items = make_items(SCENES[scene_name]["objects"])
+        cases[f"layout_write/{scene_name}"] = measure(lambda: dump_layout_v2(items), repeat)
+        text = dump_layout_v2(items)
+        cases[f"layout_read/{scene_name}"] = measure(lambda: read_layout(text), repeat)
+        cases[f"layout_patch/{scene_name}"] = measure_layout_patch(items, os.path.join(temp_dir, f"{scene_name}.json"), repeat)
+        for mode in ("GRID", "OCTREE"):
+            chunk_filepath = os.path.join(temp_dir, mode.lower(), f"{scene_name}.json")
+            cases[f"layout_chunks_{mode.lower()}/{scene_name}"] = measure_layout_chunks(items, chunk_filepath, repeat, mode)
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    return cases
+
+
+# ======================================================================================================================
+# 与基准结果比较，返回超过阈值的用例 [(用例, 当前, 基准, 阈值)]
+def find_regressions(cases, baseline_cases, max_ratio, thresholds):
+    regressions = []
+    for name, result in cases.items():
+        baseline = baseline_cases.get(name)
+        if not baseline or baseline["ms"] <= 0:
+            continue
+
+        limit = max_ratio
+        for pattern, ratio in thresholds:
+            if fnmatch.fnmatchcase(name, pattern):
+                limit = ratio
+
+        if result["ms"] > baseline["ms"] * limit:
+            regressions.append((name, result["ms"], baseline["ms"], limit))
+    return regressions
+
+
+def parse_threshold(text):
+    pattern, _, ratio = text.rpartition('=')
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"阈值格式应为 用例=倍数: {text}")
+    return pattern, float(ratio)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="benchmark_suite.py", description="MyTool 性能测试")
+    parser.add_argument("--quick", action="store_true", help="只运行小规模用例")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的运行次数")
+    parser.add_argument("--output", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="基准结果 JSON 文件")
+    parser.add_argument("--max-ratio", type=float, default=1.25, help="默认阈值：当前时间 / 基准时间")
+    parser.add_argument("--threshold", type=parse_threshold, action="append", default=[], help="单独的阈值，用例支持通配符，例如 parse/*=1.5")
+    args = parser.parse_args(argv)
+
+    config_names = QUICK_CONFIGS if args.quick else tuple(CONFIGS)
+    scene_names = QUICK_SCENES if args.quick else tuple(SCENES)
+    cases = run_benchmarks(config_names, scene_names, args.repeat)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": cases,
+    }
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline_cases = json.load(f).get("cases", {})
+
+    regressions = find_regressions(cases, baseline_cases, args.max_ratio, args.threshold)
+    for name, ms, baseline_ms, limit in regressions:
+        print(f"变慢: {name} {ms:.3f} ms，基准 {baseline_ms:.3f} ms，阈值 {limit:.2f} 倍", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]))
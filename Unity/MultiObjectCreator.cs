@@ -21,19 +21,8 @@ public class MultiObjectCreator : MonoBehaviour
         GameObject selectedObject = selectedObjects[0];
         string selectedName = selectedObject.name.Split('.')[0];
 
-        string[] basePath = Directory.GetDirectories(Application.dataPath, "*", SearchOption.AllDirectories);
-        string targetFolderPath = null;
-
-        foreach (string path in basePath)
-        {
-            if (Path.GetFileName(path) == selectedName)
-            {
-                targetFolderPath = Path.Combine(path, "Json");
-                break;
-            }
-        }
-
-        if (targetFolderPath == null || !Directory.Exists(targetFolderPath))
+        string targetFolderPath = FindJsonFolder(selectedName);
+        if (targetFolderPath == null)
         {
             Debug.LogError($"No 'Json' folder found under '{selectedName}' directory in the project.");
             return;
@@ -47,11 +36,14 @@ public class MultiObjectCreator : MonoBehaviour
         }
 
         string jsonContent = File.ReadAllText(jsonFiles[0]);
-        BaseJsonWrapper objectDataWrapper;
+        LayoutJsonWrapper layoutWrapper;
+        BaseJsonWrapper objectDataWrapper = null;
 
         try
         {
-            objectDataWrapper = JsonUtility.FromJson<BaseJsonWrapper>(jsonContent);
+            layoutWrapper = JsonUtility.FromJson<LayoutJsonWrapper>(jsonContent);
+            if (layoutWrapper.version < 2)
+                objectDataWrapper = JsonUtility.FromJson<BaseJsonWrapper>(jsonContent);
         }
         catch (System.ArgumentException e)
         {
@@ -59,26 +51,35 @@ public class MultiObjectCreator : MonoBehaviour
             return;
         }
 
-        foreach (BaseMultiJsonStruct item in objectDataWrapper.items)
+        // 版本 2：扁平数组，旋转为四元数 (w, x, y, z)
+        if (objectDataWrapper == null)
         {
-            string prefabName = Regex.Replace(item.name, @"\.\d+$", "");
-
-            string[] guids = AssetDatabase.FindAssets(prefabName);
-            if (guids.Length < 1)
+            bool hasIds = layoutWrapper.ids != null && layoutWrapper.ids.Count == layoutWrapper.names.Count;
+            for (int i = 0; i < layoutWrapper.names.Count; i++)
             {
-                Debug.LogError($"Prefab not found for: '{prefabName}'");
-                continue;
+                ReadTransform(layoutWrapper, i, out Vector3 unityPosition, out Quaternion unityRotation, out Vector3 unityScale);
+                GameObject newObj = CreateDecoration(selectedObject, layoutWrapper.names[i], unityPosition, unityRotation, unityScale);
+                if (newObj != null && hasIds)
+                    newObj.AddComponent<MyToolLayoutItem>().id = layoutWrapper.ids[i];
             }
 
-            string assetPath = AssetDatabase.GUIDToAssetPath(guids[0]);
-            GameObject prefab = AssetDatabase.LoadAssetAtPath<GameObject>(assetPath);
-
-            if (prefab == null)
+            // 记录布局文件的哈希，之后可以直接应用补丁
+            if (hasIds)
             {
-                Debug.LogError($"Prefab '{prefabName}' not found");
-                continue;
+                GameObject parent = GetDecorationParent(selectedObject);
+                MyToolLayoutItem state = parent.GetComponent<MyToolLayoutItem>();
+                if (state == null)
+                    state = parent.AddComponent<MyToolLayoutItem>();
+                state.layoutHash = HashFile(jsonFiles[0]);
             }
 
+            AssetDatabase.Refresh();
+            return;
+        }
+
+        // 版本 1：字符串形式的 Vector / Euler
+        foreach (BaseMultiJsonStruct item in objectDataWrapper.items)
+        {
             Vector3 blenderPosition = ParseVector(item.data.Find(d => d.location != null).location);
             Vector3 blenderRotation = ParseEuler(item.data.Find(d => d.euler != null).euler);
             Vector3 blenderScale = ParseVector(item.data.Find(d => d.scale != null).scale);
@@ -88,21 +89,241 @@ public class MultiObjectCreator : MonoBehaviour
             Quaternion unityRotation = Quaternion.Euler(new Vector3(blenderRotation.x, -blenderRotation.z, -blenderRotation.y));
             Vector3 unityScale = blenderScale; 
 
-            // 创建一个同名空物体
-            var newParent = GameObject.Find(selectedObject.name + "_Decoration");
-            if(newParent == null)
-                newParent = new GameObject(selectedObject.name + "_Decoration");
-            newParent.transform.SetParent(selectedObject.transform);
-            
+            CreateDecoration(selectedObject, item.name, unityPosition, unityRotation, unityScale);
+        }
+
+        AssetDatabase.Refresh();
+    }
+
+    // 只更新变化的装饰物：删除、移动、新增，装饰物需要是由带 id 的布局组装的
+    [MenuItem("Tools/4.布局补丁-From Json")]
+    public static void ApplyLayoutPatch()
+    {
+        GameObject[] selectedObjects = Selection.gameObjects;
+
+        if (selectedObjects.Length != 1)
+        {
+            Debug.LogError("Please select exactly one object.");
+            return;
+        }
+
+        GameObject selectedObject = selectedObjects[0];
+        string selectedName = selectedObject.name.Split('.')[0];
+
+        string targetFolderPath = FindJsonFolder(selectedName);
+        string patchFilePath = targetFolderPath == null ? null : Path.Combine(targetFolderPath, "Patches", selectedName + ".patch.json");
+        if (patchFilePath == null || !File.Exists(patchFilePath))
+        {
+            Debug.LogError($"No layout patch found for '{selectedName}'.");
+            return;
+        }
+
+        LayoutPatchWrapper patch;
+        try
+        {
+            patch = JsonUtility.FromJson<LayoutPatchWrapper>(File.ReadAllText(patchFilePath));
+        }
+        catch (System.ArgumentException e)
+        {
+            Debug.LogError("Failed to parse JSON: " + e.Message);
+            return;
+        }
+
+        // 补丁只能应用到它的基准布局上
+        GameObject parent = GetDecorationParent(selectedObject);
+        MyToolLayoutItem state = parent.GetComponent<MyToolLayoutItem>();
+        if (state != null && state.layoutHash == patch.target)
+        {
+            Debug.Log("布局已是最新");
+            return;
+        }
+        if (state == null || state.layoutHash != patch.@base)
+        {
+            Debug.LogError("装饰物与补丁的基准布局不一致，请删除装饰物后重新组装");
+            return;
+        }
+
+        var items = new Dictionary<string, GameObject>();
+        foreach (Transform child in parent.transform)
+        {
+            MyToolLayoutItem item = child.GetComponent<MyToolLayoutItem>();
+            if (item != null && !string.IsNullOrEmpty(item.id))
+                items[item.id] = child.gameObject;
+        }
+
+        foreach (string id in patch.removed)
+        {
+            if (items.TryGetValue(id, out GameObject removedObj))
+            {
+                DestroyImmediate(removedObj);
+                items.Remove(id);
+            }
+        }
+
+        for (int i = 0; i < patch.moved.ids.Count; i++)
+        {
+            if (!items.TryGetValue(patch.moved.ids[i], out GameObject movedObj))
+                continue;
+
+            ReadTransform(patch.moved, i, out Vector3 unityPosition, out Quaternion unityRotation, out Vector3 unityScale);
+            movedObj.transform.position = unityPosition;
+            movedObj.transform.rotation = unityRotation;
+            movedObj.transform.localScale = unityScale;
+        }
+
+        for (int i = 0; i < patch.added.ids.Count; i++)
+        {
+            ReadTransform(patch.added, i, out Vector3 unityPosition, out Quaternion unityRotation, out Vector3 unityScale);
+            GameObject newObj = CreateDecoration(selectedObject, patch.added.names[i], unityPosition, unityRotation, unityScale);
+            if (newObj != null)
+                newObj.AddComponent<MyToolLayoutItem>().id = patch.added.ids[i];
+        }
+
+        state.layoutHash = patch.target;
+        Debug.Log($"布局补丁已应用: 新增 {patch.added.ids.Count}，删除 {patch.removed.Count}，移动 {patch.moved.ids.Count}");
+    }
+
+    [MenuItem("Tools/3.实例组装-From Json")]
+    public static void InstantiateInstances()
+    {
+        string instanceFilePath = Path.Combine(Application.dataPath, "MyTool_Blender", "Instances", "instances.json");
+        if (!File.Exists(instanceFilePath))
+        {
+            Debug.LogError($"No instance table found at '{instanceFilePath}'.");
+            return;
+        }
+
+        LayoutJsonWrapper layoutWrapper;
+        try
+        {
+            layoutWrapper = JsonUtility.FromJson<LayoutJsonWrapper>(File.ReadAllText(instanceFilePath));
+        }
+        catch (System.ArgumentException e)
+        {
+            Debug.LogError("Failed to parse JSON: " + e.Message);
+            return;
+        }
+
+        var newParent = GameObject.Find("MyTool_Instances");
+        if (newParent == null)
+            newParent = new GameObject("MyTool_Instances");
+
+        // 每个网格文件只查找一次预制体
+        var prefabs = new Dictionary<int, GameObject>();
+        for (int i = 0; i < layoutWrapper.names.Count; i++)
+        {
+            int meshIndex = layoutWrapper.mesh[i];
+            if (!prefabs.TryGetValue(meshIndex, out GameObject prefab))
+            {
+                prefab = FindPrefab(Path.GetFileNameWithoutExtension(layoutWrapper.meshes[meshIndex]));
+                prefabs[meshIndex] = prefab;
+            }
+            if (prefab == null)
+                continue;
+
+            Vector3 blenderPosition = new Vector3(layoutWrapper.position[i * 3], layoutWrapper.position[i * 3 + 1], layoutWrapper.position[i * 3 + 2]);
+            Vector3 blenderScale = new Vector3(layoutWrapper.scale[i * 3], layoutWrapper.scale[i * 3 + 2], layoutWrapper.scale[i * 3 + 1]);
+            Quaternion unityRotation = new Quaternion(layoutWrapper.rotation[i * 4 + 1], -layoutWrapper.rotation[i * 4 + 3], layoutWrapper.rotation[i * 4 + 2], layoutWrapper.rotation[i * 4]);
+            Vector3 unityPosition = new Vector3(-blenderPosition.x, blenderPosition.z, -blenderPosition.y);
+
             GameObject newObj = Instantiate(prefab, newParent.transform, true);
+            newObj.name = layoutWrapper.names[i];
             newObj.transform.position = unityPosition;
             newObj.transform.rotation = unityRotation;
-            newObj.transform.localScale = unityScale;
+            newObj.transform.localScale = blenderScale;
         }
 
         AssetDatabase.Refresh();
     }
 
+    // 查找与集合同名的文件夹下的 Json 文件夹
+    private static string FindJsonFolder(string selectedName)
+    {
+        string[] basePath = Directory.GetDirectories(Application.dataPath, "*", SearchOption.AllDirectories);
+
+        foreach (string path in basePath)
+        {
+            if (Path.GetFileName(path) == selectedName)
+            {
+                string targetFolderPath = Path.Combine(path, "Json");
+                return Directory.Exists(targetFolderPath) ? targetFolderPath : null;
+            }
+        }
+
+        return null;
+    }
+
+    // 与 Blender 中的 hash_layout_text 一致：文件内容的 SHA1
+    private static string HashFile(string filePath)
+    {
+        using (var sha1 = System.Security.Cryptography.SHA1.Create())
+        {
+            return BitConverter.ToString(sha1.ComputeHash(File.ReadAllBytes(filePath))).Replace("-", "").ToLowerInvariant();
+        }
+    }
+
+    // 版本 2 数组中的第 i 个物体，从 Blender 坐标系转换到 Unity
+    private static void ReadTransform(LayoutJsonWrapper layout, int i, out Vector3 unityPosition, out Quaternion unityRotation, out Vector3 unityScale)
+    {
+        Vector3 blenderPosition = new Vector3(layout.position[i * 3], layout.position[i * 3 + 1], layout.position[i * 3 + 2]);
+        float w = layout.rotation[i * 4];
+        float x = layout.rotation[i * 4 + 1];
+        float y = layout.rotation[i * 4 + 2];
+        float z = layout.rotation[i * 4 + 3];
+
+        unityPosition = new Vector3(-blenderPosition.x, blenderPosition.z, -blenderPosition.y);
+        unityRotation = new Quaternion(x, -z, y, w);
+        unityScale = new Vector3(layout.scale[i * 3], layout.scale[i * 3 + 2], layout.scale[i * 3 + 1]);
+    }
+
+    private static GameObject GetDecorationParent(GameObject selectedObject)
+    {
+        var newParent = GameObject.Find(selectedObject.name + "_Decoration");
+        if (newParent == null)
+            newParent = new GameObject(selectedObject.name + "_Decoration");
+        newParent.transform.SetParent(selectedObject.transform);
+        return newParent;
+    }
+
+    private static GameObject FindPrefab(string itemName)
+    {
+        string prefabName = Regex.Replace(itemName, @"\.\d+$", "");
+
+        string[] guids = AssetDatabase.FindAssets(prefabName);
+        if (guids.Length < 1)
+        {
+            Debug.LogError($"Prefab not found for: '{prefabName}'");
+            return null;
+        }
+
+        string assetPath = AssetDatabase.GUIDToAssetPath(guids[0]);
+        GameObject prefab = AssetDatabase.LoadAssetAtPath<GameObject>(assetPath);
+
+        if (prefab == null)
+        {
+            Debug.LogError($"Prefab '{prefabName}' not found");
+            return null;
+        }
+
+        return prefab;
+    }
+
+    private static GameObject CreateDecoration(GameObject selectedObject, string itemName, Vector3 unityPosition, Quaternion unityRotation, Vector3 unityScale)
+    {
+        GameObject prefab = FindPrefab(itemName);
+        if (prefab == null)
+            return null;
+
+        // 创建一个同名空物体
+        var newParent = GetDecorationParent(selectedObject);
+
+        GameObject newObj = Instantiate(prefab, newParent.transform, true);
+        newObj.transform.position = unityPosition;
+        newObj.transform.rotation = unityRotation;
+        newObj.transform.localScale = unityScale;
+        return newObj;
+    }
+
     private static Vector3 ParseVector(string vectorString)
     {
         var match = Regex.Match(vectorString, @"<Vector \(([^,]+), ([^,]+), ([^,]+)\)>");
@@ -155,4 +376,28 @@ public class BaseMultiJsonData
 public class BaseJsonWrapper
 {
     public List<BaseMultiJsonStruct> items;
-}
\ No newline at end of file
+}
+
+[Serializable]
+public class LayoutJsonWrapper
+{
+    public int version;
+    public List<string> meshes;
+    public int[] mesh;
+    public List<string> ids;
+    public List<string> names;
+    public float[] position;
+    public float[] rotation;
+    public float[] scale;
+}
+
+[Serializable]
+public class LayoutPatchWrapper
+{
+    public int version;
+    public string @base;
+    public string target;
+    public List<string> removed;
+    public LayoutJsonWrapper added;
+    public LayoutJsonWrapper moved;
+}
@@ -0,0 +1,8 @@
+using UnityEngine;
+
+// 布局中的稳定 id：装饰物记录自己的 id，装饰物的父物体记录当前布局文件的哈希，应用补丁时用来对应
+public class MyToolLayoutItem : MonoBehaviour
+{
+    public string id;
+    public string layoutHash;
+}
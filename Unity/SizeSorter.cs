@@ -49,11 +49,24 @@ public class SizeSorter : MonoBehaviour
         }
     
         Dictionary<string, string> sizeData = new Dictionary<string, string>();
-        foreach (SizeJsonStruct item in objectDataWrapper.items)
+        if (objectDataWrapper.items != null)
         {
-            string name = Regex.Replace(item.name, @"\.\d+$", "");
-            string size = Regex.Replace(item.size, @"\.\d+$", "");
-            sizeData[name] = size; // 修改：使用索引器来避免重复键引发的问题
+            foreach (SizeJsonStruct item in objectDataWrapper.items)
+            {
+                string name = Regex.Replace(item.name, @"\.\d+$", "");
+                string size = Regex.Replace(item.size, @"\.\d+$", "");
+                sizeData[name] = size; // 修改：使用索引器来避免重复键引发的问题
+            }
+        }
+
+        // 版本 2：前缀规则
+        Dictionary<string, string> sizeRules = new Dictionary<string, string>();
+        if (objectDataWrapper.rules != null)
+        {
+            foreach (SizeRuleStruct rule in objectDataWrapper.rules)
+            {
+                sizeRules[rule.prefix] = rule.size;
+            }
         }
     
         // 遍历选中物体的子对象
@@ -72,7 +85,7 @@ public class SizeSorter : MonoBehaviour
             string baseName = child.name;
             string childName = baseName.IndexOf('(') != -1 ? baseName.Substring(0, baseName.IndexOf('(')) : baseName; 
 
-            if (sizeData.TryGetValue(childName, out string size))
+            if (TryGetSize(childName, sizeData, sizeRules, out string size))
             {
                 if (size.Length == 1)
                 {
@@ -95,6 +108,23 @@ public class SizeSorter : MonoBehaviour
         }
     }
     
+    // 规则：前缀 + 字母 A-Z + "_" + 00-09
+    private static bool TryGetSize(string name, Dictionary<string, string> sizeData, Dictionary<string, string> sizeRules, out string size)
+    {
+        if (sizeData.TryGetValue(name, out size))
+            return true;
+
+        int length = name.Length;
+        if (length >= 4 && name[length - 3] == '_' && name[length - 4] >= 'A' && name[length - 4] <= 'Z'
+            && name[length - 2] == '0' && char.IsDigit(name[length - 1]))
+        {
+            return sizeRules.TryGetValue(name.Substring(0, length - 4), out size);
+        }
+
+        size = null;
+        return false;
+    }
+
     public static Bounds CalculateObjectBounds(GameObject obj)
     {
         // 初始化一个空的 bounds 对象
@@ -119,8 +149,16 @@ public class SizeJsonStruct
     public string size;
 }
 
+[Serializable]
+public class SizeRuleStruct
+{
+    public string prefix;
+    public string size;
+}
+
 [Serializable]
 public class SizeJsonWrapper
 {
     public List<SizeJsonStruct> items;
+    public List<SizeRuleStruct> rules;
 }
\ No newline at end of file